@@ -7,12 +7,12 @@ from typing import Optional
 
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.farcaster import FarcasterUser
 from app.core.config import settings
+from app.core.replica import get_read_db
 
 # Key/alg
 SECRET_KEY = os.getenv("SECRET_KEY") or settings.JWT_SECRET
@@ -26,6 +26,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
+    from jose import jwt  # lazy: keeps python-jose out of worker boot
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -39,10 +40,25 @@ def get_current_user(
       1) Authorization: Bearer <token>  (Twitter flow, manual testing)
       2) Cookie: settings.SESSION_COOKIE_NAME (Farcaster cookie session)
     """
+    return _resolve_user(request, db, credentials)
+
+
+def get_current_user_read(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> FarcasterUser:
+    """get_current_user for read-only routes: shares their get_read_db session."""
+    return _resolve_user(request, db, credentials)
+
+
+def _resolve_user(request: Request, db: Session, credentials: Optional[HTTPAuthorizationCredentials]) -> FarcasterUser:
     token = credentials.credentials if credentials else request.cookies.get(settings.SESSION_COOKIE_NAME)
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         fid = payload.get("sub")
@@ -0,0 +1,173 @@
+# app/core/bulkhead.py
+"""
+Concurrency bulkheads per dependency class.
+
+Sync endpoints share one anyio threadpool (``THREADPOOL_SIZE``). Without a
+cap, a slow Neynar or RPC endpoint can hold every thread, and then even
+``GET /projects/`` queues behind it. ``BulkheadMiddleware`` sorts each
+request into a class by its route (``ROUTE_CLASSES``; ops and metrics
+routes are exempt, everything else is "db"). It admits at most N requests of a class at a time and lets up to M
+more wait for a slot (``BULKHEAD_LIMITS``, "class=N:M"). A request that
+finds the waiting line full, or waits longer than
+``BULKHEAD_MAX_WAIT_SECONDS``, gets a 503 with ``Retry-After`` straight away,
+so overload turns into fast, retryable failures rather than a stalled pool.
+
+Background work (NFT generation, image variants) has its own bounded job
+queues (app/core/jobs.py); the "images" class only covers the routes that
+submit to them.
+"""
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+from typing import Optional
+
+from starlette.routing import compile_path
+
+from app.core.config import parse_bulkheads, settings
+from app.core.metrics import Counter, Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLASS = "db"
+
+# Routes that wait on something other than our database
+ROUTE_CLASSES = {
+    "neynar": ["POST /farcaster/claimpoints"],
+    "rpc": ["POST /farcaster/siwf"],
+    "s3": [
+        "POST /projects/", "PUT /projects/{project_id}", "PUT /projects/{project_id}/image",
+        "POST /farcaster/", "PUT /farcaster/{project_id}", "PUT /farcaster/{project_id}/image",
+    ],
+    "twitter": ["GET /auth/twitter/callback"],
+    "images": ["POST /api/generate-nft"],
+    # Streaming exports hold their slot (and a thread per chunk) until the client has read it all
+    "exports": [
+        "GET /projects/{project_id}/export/xp", "GET /projects/{project_id}/export/completions",
+        "GET /farcaster/projects/{project_id}/export/completions",
+    ],
+}
+
+# Never shed: scrapes and ops endpoints are what you need while the service is overloaded
+EXEMPT_PREFIXES = ("/metrics", "/ops/")
+
+BULKHEAD_RUNNING = registry.register(Gauge(
+    "bulkhead_running", "Requests holding a bulkhead slot.", ("bulkhead",)))
+BULKHEAD_WAITING = registry.register(Gauge(
+    "bulkhead_waiting", "Requests waiting for a bulkhead slot.", ("bulkhead",)))
+BULKHEAD_REJECTED = registry.register(Counter(
+    "bulkhead_rejected_total", "Requests shed by a full bulkhead.", ("bulkhead", "reason")))
+
+
+class BulkheadFull(Exception):
+    pass
+
+
+class Bulkhead:
+    """At most ``limit`` holders and ``max_waiting`` waiters; only used on the event loop."""
+
+    def __init__(self, name: str, limit: int, max_waiting: int, max_wait_seconds: float) -> None:
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self.running = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> None:
+        if self._semaphore.locked():
+            if self.waiting >= self.max_waiting:
+                BULKHEAD_REJECTED.inc(bulkhead=self.name, reason="queue_full")
+                raise BulkheadFull(self.name)
+            self.waiting += 1
+            BULKHEAD_WAITING.inc(bulkhead=self.name)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.max_wait_seconds)
+            except asyncio.TimeoutError:
+                BULKHEAD_REJECTED.inc(bulkhead=self.name, reason="timeout")
+                raise BulkheadFull(self.name)
+            finally:
+                self.waiting -= 1
+                BULKHEAD_WAITING.dec(bulkhead=self.name)
+        else:
+            await self._semaphore.acquire()
+        self.running += 1
+        BULKHEAD_RUNNING.inc(bulkhead=self.name)
+
+    def release(self) -> None:
+        self.running -= 1
+        BULKHEAD_RUNNING.dec(bulkhead=self.name)
+        self._semaphore.release()
+
+
+def set_threadpool_size(size: int) -> None:
+    """Resize the anyio threadpool that runs sync endpoints (call on the event loop)."""
+    import anyio.to_thread
+
+    anyio.to_thread.current_default_thread_limiter().total_tokens = size
+
+
+class BulkheadMiddleware:
+    def __init__(self, app, limits: Optional[str] = None, route_classes: Optional[dict] = None) -> None:
+        self.app = app
+        limits = parse_bulkheads(settings.BULKHEAD_LIMITS if limits is None else limits)
+        self.bulkheads = {
+            name: Bulkhead(name, running, waiting, settings.BULKHEAD_MAX_WAIT_SECONDS)
+            for name, (running, waiting) in limits.items()
+        }
+        # method -> [(path regex, template, bulkhead)]; a class without a limit is not isolated
+        self.routes: dict[str, list] = {}
+        for name, routes in (ROUTE_CLASSES if route_classes is None else route_classes).items():
+            if name not in self.bulkheads:
+                continue
+            for route in routes:
+                method, _, path = route.partition(" ")
+                regex, _, _ = compile_path(path)
+                self.routes.setdefault(method, []).append((regex, path, self.bulkheads[name]))
+        self.default = self.bulkheads.get(DEFAULT_CLASS)
+
+        upstream = sum(b.limit for name, b in self.bulkheads.items() if name != DEFAULT_CLASS)
+        if upstream >= settings.THREADPOOL_SIZE:
+            logger.warning("Upstream bulkheads allow %d concurrent requests but THREADPOOL_SIZE is %d; "
+                           "a slow dependency can still starve DB-only routes", upstream, settings.THREADPOOL_SIZE)
+
+    def classify(self, method: str, path: str) -> tuple[Optional[Bulkhead], Optional[str]]:
+        if path.startswith(EXEMPT_PREFIXES):
+            return None, None
+        for regex, template, bulkhead in self.routes.get(method, ()):
+            if regex.match(path):
+                return bulkhead, template
+        return self.default, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        bulkhead, template = self.classify(scope["method"], scope["path"])
+        if bulkhead is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await bulkhead.acquire()
+        except BulkheadFull:
+            if template is not None:
+                # Shed before routing; keeps the route label in the request metrics
+                scope["route"] = SimpleNamespace(path=template)
+            await _send_busy(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            bulkhead.release()
+
+
+async def _send_busy(send) -> None:
+    body = json.dumps({"detail": "Server busy, try again shortly"}).encode()
+    await send({"type": "http.response.start", "status": 503, "headers": [
+        (b"retry-after", str(settings.BULKHEAD_RETRY_AFTER_SECONDS).encode()),
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": body})
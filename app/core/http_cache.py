@@ -0,0 +1,113 @@
+# app/core/http_cache.py
+"""
+Conditional GET support for the catalog endpoints.
+
+Every catalog collection (projects, quests, ...) has a row in ``entity_versions``
+that is bumped in the same transaction as any write to it. Read endpoints hash
+those versions into a strong ETag, so an ``If-None-Match`` revalidation costs a
+single primary-key lookup instead of loading and serializing the rows.
+"""
+import hashlib
+import os
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.entity_version import EntityVersion
+
+# Cache-Control policies
+CATALOG_CACHE = "public, max-age=30, stale-while-revalidate=300"   # list endpoints
+DETAIL_CACHE = "public, max-age=60, stale-while-revalidate=600"    # single project / quest
+PRIVATE_CACHE = "private, no-cache"                                # responses that depend on the caller
+
+# Table written -> version keys to bump. Parents also bump the children the DB cascades away.
+VERSIONED_TABLES = {
+    "projects": ("projects", "quests"),
+    "quests": ("quests",),
+    "quest_actions": ("quests",),
+    "glaria_quests": ("glaria_quests",),
+    "farcaster_projects": ("farcaster_projects", "farcaster_quests"),
+    "farcaster_quests": ("farcaster_quests",),
+    "farcaster_quest_actions": ("farcaster_quests",),
+}
+
+# Changes on every deploy, so validators issued for an old response shape never match
+ETAG_SALT = os.getenv("RENDER_GIT_COMMIT", "")
+
+
+def bump_versions(db: Session, *names: str) -> None:
+    """Increment the given version keys inside the caller's transaction."""
+    names = sorted(set(names))  # fixed order keeps concurrent writers from deadlocking
+    if not names:
+        return
+    stmt = pg_insert(EntityVersion).values([{"name": n, "version": 1} for n in names])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EntityVersion.name],
+        set_={"version": EntityVersion.version + 1},
+    )
+    db.connection().execute(stmt)
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _bump_on_flush(session, flush_context, instances):
+    names = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        names.update(VERSIONED_TABLES.get(getattr(obj, "__tablename__", None), ()))
+    bump_versions(session, *names)
+
+
+def current_versions(db: Session, names: Iterable[str]) -> list[int]:
+    names = list(names)
+    rows = dict(db.execute(
+        select(EntityVersion.name, EntityVersion.version).where(EntityVersion.name.in_(names))
+    ).all())
+    return [rows.get(n, 0) for n in names]
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2)
+    candidates = (c.strip().removeprefix("W/") for c in if_none_match.split(","))
+    return etag in candidates
+
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    db: Session,
+    *tables: str,
+    extra: Iterable = (),
+    cache_control: str = CATALOG_CACHE,
+    vary: Optional[str] = None,
+) -> Optional[Response]:
+    """
+    Compute the ETag for a read of ``tables`` and either return a ready 304
+    response, or stamp the validator headers on ``response`` and return None.
+
+    ``extra`` carries anything else the body depends on (e.g. the caller's
+    completion state) so per-user responses get per-user validators.
+    """
+    versions = current_versions(db, tables)
+    etag = make_etag(ETAG_SALT, request.url.path, request.url.query, *versions, *extra)
+
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if vary:
+        headers["Vary"] = vary
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
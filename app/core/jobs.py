@@ -0,0 +1,194 @@
+# app/core/jobs.py
+"""
+Bounded in-process job queue for slow work that should not hold a request.
+
+``JobQueue.submit`` enqueues an async callable and returns its ``Job`` at
+once; a fixed number of worker tasks on the event loop run the jobs. Jobs
+submitted with the key of a job that is still queued or running are
+coalesced into that job, so double-clicks and retries do not duplicate
+work. When the queue is full ``submit`` raises ``JobQueueFull`` and the
+caller sheds load (503) instead of buffering without limit.
+
+Jobs and their status live in this process only and are kept for
+``retention_seconds`` after they finish. That matches the single uvicorn
+process we run; several processes would need a shared store.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from app.core.metrics import Counter, Gauge, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+JOBS_WAITING = registry.register(Gauge(
+    "jobs_waiting", "Background jobs queued but not started.", ("queue",)))
+JOBS_RUNNING = registry.register(Gauge(
+    "jobs_running", "Background jobs currently running.", ("queue",)))
+JOBS_FINISHED = registry.register(Counter(
+    "jobs_finished_total", "Background jobs finished, by outcome.", ("queue", "status")))
+JOBS_COALESCED = registry.register(Counter(
+    "jobs_coalesced_total", "Submissions folded into an already active job.", ("queue",)))
+JOB_DURATION = registry.register(Histogram(
+    "job_duration_seconds", "Background job run time (excluding time queued).", ("queue", "status"),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)))
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobError(Exception):
+    """Raised by a job with a message that is safe to show to its owner."""
+
+
+class Job:
+    __slots__ = ("id", "key", "owner", "status", "stage", "result", "error",
+                 "created_at", "started_at", "finished_at", "_fn")
+
+    def __init__(self, key: Optional[str], owner, fn: Callable[["Job"], Awaitable]) -> None:
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.owner = owner
+        self.status = QUEUED
+        self.stage: Optional[str] = None
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._fn = fn
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    def __init__(self, name: str, workers: int, maxsize: int,
+                 retention_seconds: float = 3600, max_jobs: int = 10_000) -> None:
+        self.name = name
+        self.workers = workers
+        self.maxsize = maxsize
+        self.retention_seconds = retention_seconds
+        self.max_jobs = max_jobs
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: list[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active_by_key: dict[str, Job] = {}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Spawn the workers on the running event loop (app lifespan)."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker(), name=f"{self.name}-job-{i}") for i in range(self.workers)]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let queued and running jobs finish for up to ``timeout`` seconds, then cancel them."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%s jobs: %d still pending at shutdown", self.name, self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, fn: Callable[[Job], Awaitable], key: Optional[str] = None, owner=None) -> tuple[Job, bool]:
+        """Queue ``fn(job)``; returns (job, created). Must be called on the event loop."""
+        if not self.running:
+            raise RuntimeError(f"{self.name} job queue is not running")
+        if key is not None:
+            active = self._active_by_key.get(key)
+            if active is not None:
+                JOBS_COALESCED.inc(queue=self.name)
+                return active, False
+
+        job = Job(key, owner, fn)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(self.name)
+        JOBS_WAITING.inc(queue=self.name)
+        if key is not None:
+            self._active_by_key[key] = job
+        self._remember(job)
+        return job, True
+
+    def submit_threadsafe(self, fn: Callable[[Job], Awaitable], key: Optional[str] = None,
+                          owner=None, timeout: float = 5.0) -> tuple[Job, bool]:
+        """``submit`` from a sync endpoint or another thread."""
+        if not self.running:
+            raise RuntimeError(f"{self.name} job queue is not running")
+
+        async def _submit():
+            return self.submit(fn, key=key, owner=owner)
+
+        return asyncio.run_coroutine_threadsafe(_submit(), self._loop).result(timeout)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def _remember(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        cutoff = time.time() - self.retention_seconds
+        # Oldest first: drop finished jobs past retention, and any finished ones over the cap
+        for old in list(self._jobs.values()):
+            if len(self._jobs) <= self.max_jobs and (old.finished_at is None or old.finished_at > cutoff):
+                break
+            if not old.active:
+                del self._jobs[old.id]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            JOBS_WAITING.dec(queue=self.name)
+            JOBS_RUNNING.inc(queue=self.name)
+            job.status, job.started_at = RUNNING, time.time()
+            try:
+                job.result = await job._fn(job)
+                job.status = SUCCEEDED
+            except asyncio.CancelledError:
+                job.status, job.error = FAILED, "Cancelled at shutdown"
+                raise
+            except JobError as e:
+                job.status, job.error = FAILED, str(e)
+                logger.warning("%s job %s failed: %s", self.name, job.id, e)
+            except Exception:
+                job.status, job.error = FAILED, "Internal error"
+                logger.exception("%s job %s crashed", self.name, job.id)
+            finally:
+                job.finished_at = time.time()
+                job._fn = None
+                if job.key is not None and self._active_by_key.get(job.key) is job:
+                    del self._active_by_key[job.key]
+                JOBS_RUNNING.dec(queue=self.name)
+                JOBS_FINISHED.inc(queue=self.name, status=job.status)
+                JOB_DURATION.observe(job.finished_at - job.started_at, queue=self.name, status=job.status)
+                self._queue.task_done()
@@ -0,0 +1,160 @@
+# app/core/log.py
+"""
+Structured, non-blocking logging for the ``app.*`` loggers.
+
+``configure_logging`` attaches one handler to the ``app`` logger. On the
+calling thread it only runs ``RecordFilter`` (level, per-route sampling,
+truncation, request context) and puts the record on a bounded queue; a
+``QueueListener`` thread formats it as one JSON object per line and writes
+it to stdout. With LOG_QUEUE=false the same pipeline writes inline, which
+is what benchmarks/bench_logging.py compares against.
+
+- Level: LOG_LEVEL (DEBUG carries the truncated Neynar / DeepAI bodies).
+- Sampling: LOG_SAMPLE_ROUTES keeps a share of DEBUG/INFO records per route
+  template; warnings and errors are never sampled out.
+- Truncation: string arguments and extras are cut to LOG_MAX_FIELD_CHARS,
+  so a full API response never reaches the log.
+- A full queue drops the record (counted in ``log_records_dropped_total``)
+  rather than blocking the request.
+"""
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.config import parse_route_rates, settings
+from app.core.metrics import Counter, registry
+from app.core.sql_metrics import current_request_sql
+
+LOGGER_NAME = "app"
+
+LOG_RECORDS_DROPPED = registry.register(Counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full."))
+
+# Attributes every LogRecord has; anything else was passed via extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "trace_id", "span_id", "route", "method",
+}
+
+
+def truncate(value, limit: Optional[int] = None):
+    """Cut long strings/bytes (recursively inside dicts and lists) to ``limit`` characters."""
+    limit = settings.LOG_MAX_FIELD_CHARS if limit is None else limit
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "replace")
+    if isinstance(value, str):
+        if len(value) <= limit:
+            return value
+        return f"{value[:limit]}...[{len(value) - limit} more chars]"
+    if isinstance(value, dict):
+        return {k: truncate(v, limit) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(truncate(v, limit) for v in value)
+    return value
+
+
+class RecordFilter(logging.Filter):
+    """Runs on the logging thread: sampling, truncation and request context."""
+
+    def __init__(self, sample_rates: dict[str, float]) -> None:
+        super().__init__()
+        self.sample_rates = sample_rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        stats = current_request_sql()
+        if stats is not None:
+            record.method = stats.scope.get("method")
+            record.route = stats.route
+            if self.sample_rates and record.levelno < logging.WARNING:
+                rate = self.sample_rates.get(f"{record.method} {record.route}", 1.0)
+                if random.random() >= rate:
+                    return False
+
+        # Truncate now: the listener formats later, and args may be huge response bodies
+        if record.args:
+            if isinstance(record.args, dict):
+                record.args = truncate(record.args)
+            else:
+                record.args = tuple(truncate(a) for a in record.args)
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and isinstance(value, (str, bytes, dict, list)):
+                setattr(record, key, truncate(value))
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in ("trace_id", "span_id", "method", "route"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread; the record is only read from there
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[logging.Handler] = None
+
+
+def configure_logging(stream=None, use_queue: Optional[bool] = None) -> None:
+    """(Re)install the pipeline on the ``app`` logger; safe to call more than once."""
+    global _listener, _handler
+    shutdown_logging()
+
+    use_queue = settings.LOG_QUEUE if use_queue is None else use_queue
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    if use_queue:
+        handler = _QueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+        _listener = QueueListener(handler.queue, output)
+        _listener.start()
+    else:
+        handler = output
+    handler.addFilter(RecordFilter(parse_route_rates(settings.LOG_SAMPLE_ROUTES)))
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(settings.LOG_LEVEL)
+    logger.addHandler(handler)
+    logger.propagate = False  # keep app records out of uvicorn's root handlers
+    _handler = handler
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and detach the handler (lifespan shutdown)."""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _handler is not None:
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.removeHandler(_handler)
+        logger.propagate = True  # until the next configure_logging, fall back to the root handlers
+        _handler.flush()
+        _handler = None
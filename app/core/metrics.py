@@ -0,0 +1,213 @@
+# app/core/metrics.py
+"""
+In-process metrics in the Prometheus text exposition format.
+
+A deliberately small registry (counters, gauges, histograms with labels)
+so /metrics works without a client library or a push gateway. Values are
+per worker process; Prometheus sums them across scrape targets.
+
+``MetricsMiddleware`` records request latency, status and in-flight counts
+by route template; ``observe_dependency`` times calls to external services.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from app.core.sql_metrics import current_request_sql, route_of
+from app.core.tracing import SPAN_KIND_CLIENT, start_span
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: Optional[tuple] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_items(items))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_items(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: tuple = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _render_items(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")))
+REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP responses by route template and status code.", ("method", "route", "status")))
+REQUEST_ERRORS = registry.register(Counter(
+    "http_request_errors_total", "HTTP requests that failed with a 5xx or an unhandled exception.", ("method", "route")))
+IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."))
+REQUEST_DB_STATEMENTS = registry.register(Histogram(
+    "http_request_db_statements", "SQL statements executed per request.", ("method", "route"),
+    buckets=STATEMENT_BUCKETS))
+REQUEST_DB_TIME = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent in SQL per request.", ("method", "route")))
+DEPENDENCY_LATENCY = registry.register(Histogram(
+    "dependency_request_duration_seconds", "Latency of calls to external services.",
+    ("dependency", "operation", "outcome")))
+DEPENDENCY_ERRORS = registry.register(Counter(
+    "dependency_errors_total", "Calls to external services that raised.", ("dependency", "operation")))
+
+
+@contextmanager
+def observe_dependency(dependency: str, operation: str):
+    """Time a call to an external service (Neynar, RPC, S3, DeepAI, Twitter); also a trace span."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        with start_span(f"{dependency} {operation}", SPAN_KIND_CLIENT,
+                        **{"peer.service": dependency, "operation": operation}):
+            yield
+    except BaseException:
+        outcome = "error"
+        DEPENDENCY_ERRORS.inc(dependency=dependency, operation=operation)
+        raise
+    finally:
+        DEPENDENCY_LATENCY.observe(time.perf_counter() - start,
+                                   dependency=dependency, operation=operation, outcome=outcome)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+        IN_FLIGHT.inc()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            method = scope["method"]
+            # Unmatched paths share one label so scanners cannot explode cardinality
+            route = route_of(scope) if "route" in scope else "<unmatched>"
+            REQUEST_LATENCY.observe(time.perf_counter() - start, method=method, route=route)
+            REQUESTS.inc(method=method, route=route, status=status)
+            if status >= 500:
+                REQUEST_ERRORS.inc(method=method, route=route)
+            sql = current_request_sql()
+            if sql is not None:
+                REQUEST_DB_STATEMENTS.observe(sql.count, method=method, route=route)
+                REQUEST_DB_TIME.observe(sql.total_seconds, method=method, route=route)
@@ -0,0 +1,29 @@
+# app/core/migrations.py
+from pathlib import Path
+
+from sqlalchemy import text
+
+from app.database import engine
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Arbitrary app-wide key so only one worker runs migrations at a time
+MIGRATION_LOCK_ID = 0x61A12A
+
+
+def upgrade_to_head():
+    """Run `alembic upgrade head`, serialized across workers by an advisory lock."""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+
+    with engine.connect() as lock_conn:
+        # Waiting for another worker's migration can outlast DB_STATEMENT_TIMEOUT_MS
+        lock_conn.execute(text("SET statement_timeout = 0"))
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            command.upgrade(config, "head")
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
@@ -0,0 +1,99 @@
+# app/core/pool_metrics.py
+"""
+Connection-pool instrumentation.
+
+The app engines use ``InstrumentedQueuePool``, which times every checkout
+(waiting for a free connection, or opening an overflow one) and counts
+checkout timeouts per pool. ``pool_snapshot`` combines those numbers with the pool's
+own gauges for the /ops/db-pool endpoint.
+"""
+import threading
+import time
+from collections import deque
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+RECENT_CHECKOUTS = 2048  # window for the latency percentiles
+
+
+class CheckoutStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.count = 0
+            self.timeouts = 0
+            self.total_seconds = 0.0
+            self.max_seconds = 0.0
+            self.recent = deque(maxlen=RECENT_CHECKOUTS)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self.recent.append(seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self.recent)
+            count, timeouts, total, peak = self.count, self.timeouts, self.total_seconds, self.max_seconds
+
+        def pct(p):
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 3)
+
+        return {
+            "count": count,
+            "timeouts": timeouts,
+            "avg_ms": round(total / count * 1000, 3) if count else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": round(peak * 1000, 3),
+        }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout latency into ``self.checkout_stats``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+
+    def recreate(self):
+        new_pool = super().recreate()
+        new_pool.checkout_stats = self.checkout_stats  # keep history across engine.dispose()
+        return new_pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_stats.record_timeout()
+            raise
+        self.checkout_stats.record(time.perf_counter() - start)
+        return conn
+
+
+def pool_snapshot(pool) -> dict:
+    snapshot = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # QueuePool.overflow() starts at -size; clamp to "connections beyond pool_size"
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout_seconds": pool.timeout(),
+    }
+    snapshot["checkout"] = pool.checkout_stats.snapshot()
+    return snapshot
@@ -0,0 +1,46 @@
+# app/core/prewarm.py
+"""
+Background import of the heavy third-party modules.
+
+Routes import web3/siwe/eth_account/boto3/jose/requests/Pillow on first
+use, so a worker boots without them. With PREWARM_IMPORTS on, the lifespan
+starts a daemon thread that imports them while the server is already
+accepting requests, so the first login or upload does not pay the import
+either.
+"""
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Ordered roughly by cost; siwe compiles its ABNF grammars on import
+HEAVY_MODULES = (
+    "siwe",
+    "web3",
+    "eth_account",
+    "eth_account.messages",
+    "boto3",
+    "jose.jwt",
+    "requests",
+    "PIL.Image",
+)
+
+
+def prewarm_imports(modules=HEAVY_MODULES) -> float:
+    start = time.perf_counter()
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            logger.exception("Prewarm import of %s failed", name)
+    elapsed = time.perf_counter() - start
+    logger.info("Prewarmed %d modules in %.0f ms", len(modules), elapsed * 1000)
+    return elapsed
+
+
+def start_prewarm() -> threading.Thread:
+    thread = threading.Thread(target=prewarm_imports, name="import-prewarm", daemon=True)
+    thread.start()
+    return thread
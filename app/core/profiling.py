@@ -0,0 +1,245 @@
+# app/core/profiling.py
+"""
+Opt-in request profiling.
+
+With PROFILING_ENABLED on, ``ProfilingMiddleware`` profiles a request when
+either
+- it carries ``X-Profile: 1`` (or ``?__profile=1``) plus a valid
+  ``X-Ops-Token``, or
+- its route is listed in PROFILE_SAMPLE_ROUTES and wins the sampling draw
+  (``"GET /api/quests/{quest_id}=0.05,POST /farcaster/claimpoints=0.01"``).
+
+The route's endpoint call is wrapped once so that, for a profiled request,
+it records which thread and frame it runs in (a threadpool worker for sync
+endpoints, the loop for async ones). A sampler thread snapshots that
+thread's stack (``sys._current_frames``) each PROFILE_INTERVAL_MS and keeps
+it only while it runs through that frame, trimmed to start at the endpoint.
+Concurrent requests to the same route therefore never leak into the profile. The result is written in
+folded-stack format (flamegraph.pl / speedscope) to PROFILE_DIR, which is
+capped at PROFILE_MAX_FILES; /ops/profiles lists and serves the files.
+
+When PROFILING_ENABLED is off the middleware is not installed at all.
+"""
+import hmac
+import inspect
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Optional
+
+import anyio
+from starlette.routing import Match
+
+from app.core.config import parse_route_rates, settings
+
+MAX_CONCURRENT_PROFILES = 2
+_SLUG = re.compile(r"[^A-Za-z0-9]+")
+
+
+def profile_dir() -> Path:
+    return Path(settings.PROFILE_DIR)
+
+
+def list_profiles() -> list[dict]:
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    entries = []
+    for path in directory.glob("*.folded"):
+        stat = path.stat()
+        entries.append({"name": path.name, "bytes": stat.st_size, "created": stat.st_mtime})
+    return sorted(entries, key=lambda e: e["created"], reverse=True)
+
+
+def profile_path(name: str) -> Optional[Path]:
+    """Resolve a listed profile by name; None for anything outside PROFILE_DIR."""
+    if "/" in name or "\\" in name or not name.endswith(".folded"):
+        return None
+    path = profile_dir() / name
+    return path if path.is_file() else None
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    for root in sys.path:
+        if root and filename.startswith(root):
+            filename = os.path.relpath(filename, root)
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples the stack below ``entry``, the endpoint call of the profiled request."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        # (thread ident, wrapper frame) while the endpoint runs; set by _profiled
+        self.entry = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            entry = self.entry
+            if entry is None:
+                continue
+            thread_id, entry_frame = entry
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                if frame is entry_frame:
+                    if stack:
+                        self.stacks[tuple(reversed(stack))] += 1
+                    break
+                stack.append(frame.f_code)
+                frame = frame.f_back
+
+    def folded(self) -> str:
+        lines = [";".join(_frame_label(c) for c in stack) + f" {n}" for stack, n in self.stacks.most_common()]
+        return "\n".join(lines) + "\n"
+
+
+_sampler: ContextVar[Optional[StackSampler]] = ContextVar("profile_sampler", default=None)
+
+
+def _profiled(call):
+    """Wrap an endpoint so a profiled request tells its sampler where it runs."""
+    if getattr(call, "__profiled__", False):
+        return call
+
+    if inspect.iscoroutinefunction(call):
+        @wraps(call)
+        async def wrapper(*args, **kwargs):
+            sampler = _sampler.get()
+            if sampler is None:
+                return await call(*args, **kwargs)
+            sampler.entry = (threading.get_ident(), sys._getframe())
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                sampler.entry = None
+    else:
+        @wraps(call)
+        def wrapper(*args, **kwargs):
+            sampler = _sampler.get()
+            if sampler is None:
+                return call(*args, **kwargs)
+            sampler.entry = (threading.get_ident(), sys._getframe())
+            try:
+                return call(*args, **kwargs)
+            finally:
+                sampler.entry = None
+
+    wrapper.__profiled__ = True
+    return wrapper
+
+
+def _write_profile(name: str, content: str) -> None:
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / name).write_text(content)
+
+    # Keep the directory bounded: drop the oldest profiles
+    files = sorted(directory.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+    for stale in files[:max(0, len(files) - settings.PROFILE_MAX_FILES)]:
+        stale.unlink(missing_ok=True)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.sample_rates = parse_route_rates(settings.PROFILE_SAMPLE_ROUTES)
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def _requested(self, scope) -> bool:
+        flag = _header(scope, b"x-profile") == "1" or b"__profile=1" in scope.get("query_string", b"")
+        if not flag or not settings.OPS_TOKEN:
+            return False
+        token = _header(scope, b"x-ops-token") or ""
+        return hmac.compare_digest(token.encode(), settings.OPS_TOKEN.encode())
+
+    def _match(self, scope):
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route
+        return None
+
+    def _route_to_profile(self, scope):
+        requested = self._requested(scope)
+        if not requested and not self.sample_rates:
+            return None
+        route = self._match(scope)
+        if route is None or getattr(route, "dependant", None) is None:
+            return None
+        if not requested:
+            rate = self.sample_rates.get(f"{scope['method']} {route.path}", 0.0)
+            if random.random() >= rate:
+                return None
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route_to_profile(scope)
+        if route is not None:
+            with self._lock:
+                if self._active >= MAX_CONCURRENT_PROFILES:
+                    route = None
+                else:
+                    self._active += 1
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        slug = _SLUG.sub("-", route.path).strip("-") or "root"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{slug}-{uuid.uuid4().hex[:6]}.folded"
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", name.encode())]
+            await send(message)
+
+        # FastAPI reads dependant.call per request (sync vs async was decided up front; the wrapper keeps it)
+        route.dependant.call = _profiled(route.dependant.call)
+        sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000)
+        token = _sampler.set(sampler)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _sampler.reset(token)
+            await anyio.to_thread.run_sync(sampler.stop)
+            try:
+                await anyio.to_thread.run_sync(_write_profile, name, sampler.folded())
+            finally:
+                with self._lock:
+                    self._active -= 1
@@ -0,0 +1,240 @@
+# app/core/ratelimit.py
+"""
+Per-caller rate limits for expensive routes (GCRA).
+
+``RATE_LIMIT_RULES`` maps exact "METHOD /path" pairs to N requests per
+period. Each caller gets a generic cell rate: requests are spaced
+``period / N`` apart on average, with bursts of up to N. Only the
+"theoretical arrival time" (TAT) is stored per caller, so a check is one
+dict lookup and a little arithmetic.
+
+Callers are the token's subject when the request carries a valid JWT
+(Bearer header or session cookie), else the client IP. Verified tokens are
+cached, so the signature is checked once per token rather than per request.
+Behind proxies the IP is the X-Forwarded-For entry our edge proxy appended
+(``RATE_LIMIT_TRUSTED_HOPS`` from the right), never the leftmost entry,
+which the client can set to anything.
+
+State lives in this process unless ``RATE_LIMIT_REDIS_URL`` is set. With
+Redis, the same GCRA runs as a Lua script so several processes share the
+limits. If Redis fails, the process falls back to its local limits instead of
+failing requests.
+
+Every limited response carries ``RateLimit-Limit``, ``RateLimit-Remaining``,
+``RateLimit-Reset`` and ``RateLimit-Policy`` headers. Rejections are a 429
+with ``Retry-After``.
+"""
+import json
+import logging
+import math
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+from starlette.requests import cookie_parser
+
+from app.core.config import parse_rate_limits, settings
+from app.core.metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED = registry.register(Counter(
+    "rate_limited_total", "Requests rejected by the rate limiter.", ("route",)))
+RATE_LIMIT_BACKEND_ERRORS = registry.register(Counter(
+    "rate_limit_backend_errors_total", "Shared rate-limit backend failures (local limits used instead)."))
+
+MAX_CACHED_TOKENS = 10_000
+
+# KEYS[1] = caller key; ARGV = emission interval, period (seconds). Uses the
+# Redis clock so processes with skewed clocks agree.
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+if new_tat - period > now then
+    return {0, tostring(new_tat - period - now), tostring(tat - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0', tostring(new_tat - now)}
+"""
+
+
+class MemoryBackend:
+    """TATs in a dict; the middleware only touches it from the event loop, so no lock."""
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        # Ordered by last hit: the front holds the callers seen least recently
+        self._tat: dict[str, float] = {}
+
+    def hit(self, key: str, interval: float, period: float) -> tuple[bool, float, float]:
+        """(allowed, retry_after, reset_after) in seconds."""
+        now = time.monotonic()
+        tat = self._tat.get(key, now)
+        if tat < now:
+            tat = now
+        new_tat = tat + interval
+        if new_tat - period > now:
+            return False, new_tat - period - now, tat - now
+        if self._tat.pop(key, None) is None and len(self._tat) >= self.max_keys:
+            self._evict()
+        self._tat[key] = new_tat
+        return True, 0.0, new_tat - now
+
+    def _evict(self) -> None:
+        # Drop the least recently seen callers; everyone else keeps their state
+        tats = self._tat
+        while len(tats) >= self.max_keys:
+            del tats[next(iter(tats))]
+
+
+class RedisBackend:
+    def __init__(self, url: str) -> None:
+        import redis.asyncio as redis  # optional dependency, only with RATE_LIMIT_REDIS_URL
+
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(GCRA_SCRIPT)
+
+    async def hit(self, key: str, interval: float, period: float) -> tuple[bool, float, float]:
+        allowed, retry_after, reset_after = await self._script(keys=[f"ratelimit:{key}"], args=[interval, period])
+        return bool(int(allowed)), float(retry_after), float(reset_after)
+
+
+class Rule:
+    __slots__ = ("name", "limit", "period", "interval", "policy", "route")
+
+    def __init__(self, method: str, path: str, limit: int, period: float) -> None:
+        self.name = f"{method} {path}"
+        self.limit = limit
+        self.period = period
+        self.interval = period / limit
+        self.policy = f"{limit};w={period:g}".encode()
+        # Rejected requests never reach the router; this gives the request metrics their route label
+        self.route = SimpleNamespace(path=path)
+
+    def headers(self, reset_after: float) -> list[tuple[bytes, bytes]]:
+        remaining = max(int((self.period - reset_after) / self.interval + 1e-9), 0)
+        return [
+            (b"ratelimit-limit", str(self.limit).encode()),
+            (b"ratelimit-remaining", str(remaining).encode()),
+            (b"ratelimit-reset", str(math.ceil(reset_after)).encode()),
+            (b"ratelimit-policy", self.policy),
+        ]
+
+
+_subjects: dict[str, tuple[Optional[str], float]] = {}
+
+
+def _token_subject(token: str) -> Optional[str]:
+    """The "sub" of a valid token, cached until the token expires; None if invalid."""
+    cached = _subjects.get(token)
+    now = time.time()
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    from jose import JWTError, jwt
+    from app.auth.token import ALGORITHM, SECRET_KEY
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        subject, expires = None, now + 60
+    else:
+        subject = payload.get("sub")
+        subject, expires = (str(subject) if subject is not None else None), float(payload.get("exp") or now + 60)
+    if len(_subjects) >= MAX_CACHED_TOKENS:
+        _subjects.clear()
+    _subjects[token] = (subject, expires)
+    return subject
+
+
+def client_ip(scope, forwarded_for: list[str], trusted_hops: int) -> str:
+    """
+    The address our edge proxy saw. Each proxy appends its peer to
+    X-Forwarded-For, so with N trusted hops the client is the Nth entry from
+    the right; anything further left was written by the client and is ignored.
+    """
+    if trusted_hops > 0:
+        hosts = [h.strip() for h in ",".join(forwarded_for).split(",") if h.strip()]
+        if len(hosts) >= trusted_hops:
+            return hosts[-trusted_hops]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def caller_key(scope, trusted_hops: int = 0) -> str:
+    token = None
+    cookie = None
+    forwarded_for = []
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            value = value.decode("latin-1")
+            if value[:7].lower() == "bearer ":
+                token = value[7:].strip()
+        elif name == b"cookie":
+            cookie = value.decode("latin-1")
+        elif name == b"x-forwarded-for":
+            forwarded_for.append(value.decode("latin-1"))
+    if token is None and cookie:
+        token = cookie_parser(cookie).get(settings.SESSION_COOKIE_NAME)
+    if token:
+        subject = _token_subject(token)
+        if subject is not None:
+            return f"sub:{subject}"
+    return f"ip:{client_ip(scope, forwarded_for, trusted_hops)}"
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, rules: Optional[str] = None, redis_url: Optional[str] = None) -> None:
+        self.app = app
+        self.rules = {
+            key: Rule(key[0], key[1], limit, period)
+            for key, (limit, period) in parse_rate_limits(settings.RATE_LIMIT_RULES if rules is None else rules).items()
+        }
+        self.trusted_hops = settings.RATE_LIMIT_TRUSTED_HOPS
+        self.local = MemoryBackend(settings.RATE_LIMIT_MAX_KEYS)
+        redis_url = settings.RATE_LIMIT_REDIS_URL if redis_url is None else redis_url
+        self.shared = RedisBackend(redis_url) if redis_url else None
+
+    async def __call__(self, scope, receive, send):
+        rule = self.rules.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = f"{rule.name}|{caller_key(scope, self.trusted_hops)}"
+        allowed, retry_after, reset_after = await self._hit(key, rule)
+        headers = rule.headers(reset_after)
+
+        if not allowed:
+            RATE_LIMITED.inc(route=rule.name)
+            scope["route"] = rule.route
+            body = json.dumps({"detail": "Too many requests"}).encode()
+            headers += [
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ]
+            await send({"type": "http.response.start", "status": 429, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _hit(self, key: str, rule: Rule) -> tuple[bool, float, float]:
+        if self.shared is not None:
+            try:
+                return await self.shared.hit(key, rule.interval, rule.period)
+            except Exception as e:
+                RATE_LIMIT_BACKEND_ERRORS.inc()
+                logger.warning("Rate-limit backend failed, using local limits: %r", e)
+        return self.local.hit(key, rule.interval, rule.period)
@@ -0,0 +1,213 @@
+# app/core/replica.py
+"""
+Read-replica routing for read-only endpoints.
+
+``get_read_db`` hands out a session on the replica (``REPLICA_DATABASE_URL``)
+unless one of these sends the request to the primary instead:
+
+- no replica is configured;
+- the caller wrote recently: a request whose primary session committed a
+  write sets the ``glaria_rw`` cookie and records the caller's token in a
+  process-local map, both valid for ``READ_YOUR_WRITES_SECONDS``;
+- the replica failed its last health check (unreachable, or lagging more
+  than ``REPLICA_MAX_LAG_SECONDS``). The check runs at most every
+  ``REPLICA_HEALTH_CHECK_SECONDS`` on the request path, and a connection
+  error during a replica read marks it unhealthy immediately.
+"""
+import hashlib
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.database import ReadSessionLocal, SessionLocal, replica_engine
+
+logger = logging.getLogger(__name__)
+
+RW_COOKIE_NAME = "glaria_rw"
+MAX_TRACKED_WRITERS = 10_000
+
+REPLICA_LAG = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+# Per-request marker flipped by the session events below
+_request_writes: ContextVar[Optional[dict]] = ContextVar("request_writes", default=None)
+
+# Token hash -> monotonic deadline until which that caller reads from the primary
+_recent_writers: dict[str, float] = {}
+_recent_writers_lock = threading.Lock()
+
+
+def _caller_key(request: Request) -> Optional[str]:
+    auth = request.headers.get("authorization", "")
+    token = auth[7:].strip() if auth.lower().startswith("bearer ") else request.cookies.get(settings.SESSION_COOKIE_NAME)
+    return hashlib.sha256(token.encode()).hexdigest()[:32] if token else None
+
+
+def _note_writer(request: Request) -> None:
+    key = _caller_key(request)
+    if key is None:
+        return
+    now = time.monotonic()
+    with _recent_writers_lock:
+        if len(_recent_writers) >= MAX_TRACKED_WRITERS:
+            for stale in [k for k, until in _recent_writers.items() if until <= now]:
+                del _recent_writers[stale]
+        _recent_writers[key] = now + settings.READ_YOUR_WRITES_SECONDS
+
+
+def _wrote_recently(request: Request) -> bool:
+    cookie = request.cookies.get(RW_COOKIE_NAME)
+    try:
+        if cookie and float(cookie) > time.time():
+            return True
+    except ValueError:
+        pass
+    key = _caller_key(request)
+    return key is not None and _recent_writers.get(key, 0) > time.monotonic()
+
+
+class ReplicaHealth:
+    def __init__(self) -> None:
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def is_healthy(self) -> bool:
+        # One request refreshes the status; the others use the last result
+        due = time.monotonic() - self._checked_at >= settings.REPLICA_HEALTH_CHECK_SECONDS
+        if due and self._lock.acquire(blocking=False):
+            try:
+                self._check()
+            finally:
+                self._checked_at = time.monotonic()
+                self._lock.release()
+        return self.healthy
+
+    def _check(self) -> None:
+        try:
+            with replica_engine.connect() as conn:
+                lag = conn.execute(REPLICA_LAG).scalar()
+        except Exception as e:
+            if self.healthy:
+                logger.warning("Replica unreachable, reading from primary: %s", e.__class__.__name__)
+            self.healthy, self.lag_seconds = False, None
+            return
+        self.lag_seconds = float(lag or 0)
+        healthy = self.lag_seconds <= settings.REPLICA_MAX_LAG_SECONDS
+        if healthy != self.healthy:
+            logger.warning("Replica %s (lag %.1fs)", "healthy again" if healthy else "lagging, reading from primary",
+                           self.lag_seconds)
+        self.healthy = healthy
+
+    def mark_unhealthy(self) -> None:
+        self.healthy = False
+        self._checked_at = time.monotonic()
+
+
+replica_health = ReplicaHealth()
+
+
+def read_sessionmaker(request: Request) -> sessionmaker:
+    """The replica's sessionmaker when it is safe to read from it, else the primary's."""
+    if ReadSessionLocal is not None and not _wrote_recently(request) and replica_health.is_healthy():
+        return ReadSessionLocal
+    return SessionLocal
+
+
+def get_read_db(request: Request):
+    """Like get_db, but on the replica when it is safe to read from it."""
+    factory = read_sessionmaker(request)
+    on_replica = factory is ReadSessionLocal
+    db = factory()
+    try:
+        yield db
+    except OperationalError:
+        if on_replica:
+            replica_health.mark_unhealthy()
+        raise
+    finally:
+        db.close()
+
+
+# ---------- Write tracking ----------
+
+if ReadSessionLocal is not None:
+
+    @event.listens_for(SessionLocal, "after_flush")
+    def _flag_flush(session, flush_context):
+        session.info["rw_wrote"] = True
+
+    @event.listens_for(SessionLocal, "do_orm_execute")
+    def _flag_execute(orm_execute_state):
+        # Core DML and text() statements (e.g. the XP CTEs); text SELECTs are
+        # flagged too, which only costs a few seconds of primary reads
+        if not orm_execute_state.is_select:
+            orm_execute_state.session.info["rw_wrote"] = True
+
+    @event.listens_for(SessionLocal, "after_commit")
+    def _record_commit(session):
+        if session.info.pop("rw_wrote", False):
+            marker = _request_writes.get()
+            if marker is not None:
+                marker["wrote"] = True
+
+    @event.listens_for(SessionLocal, "after_rollback")
+    def _clear_flag(session):
+        session.info.pop("rw_wrote", None)
+
+
+def _rw_cookie_header(until: float) -> tuple[bytes, bytes]:
+    samesite = settings.SESSION_COOKIE_SAMESITE
+    response = Response()
+    response.set_cookie(
+        key=RW_COOKIE_NAME,
+        value=str(int(until)),
+        max_age=settings.READ_YOUR_WRITES_SECONDS,
+        httponly=True,
+        secure=settings.SESSION_COOKIE_SECURE or samesite.lower() == "none",
+        samesite=samesite,
+        domain=settings.SESSION_COOKIE_DOMAIN,
+        path="/",
+    )
+    return response.raw_headers[-1]
+
+
+class ReadYourWritesMiddleware:
+    """Marks callers whose request committed a write on the primary."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or ReadSessionLocal is None:
+            await self.app(scope, receive, send)
+            return
+
+        marker = {"wrote": False}
+        token = _request_writes.set(marker)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and marker["wrote"]:
+                _note_writer(Request(scope))
+                until = time.time() + settings.READ_YOUR_WRITES_SECONDS
+                message["headers"] = [*message.get("headers", []), _rw_cookie_header(until)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_writes.reset(token)
@@ -0,0 +1,39 @@
+# app/core/serialization.py
+"""
+Fast JSON path for large list responses.
+
+FastAPI's default path validates the handler's return value against
+``response_model``, runs the result through ``jsonable_encoder`` and then
+``json.dumps``. For list endpoints we instead validate once with a pre-built
+``TypeAdapter`` and let pydantic-core serialize straight to bytes. Routes keep
+their ``response_model`` for the OpenAPI schema; returning a ``Response``
+directly makes FastAPI skip its own validation and encoding.
+"""
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+_SKIP_HEADERS = {b"content-length", b"content-type"}
+
+
+def json_response(
+    adapter: TypeAdapter,
+    data: Any,
+    response: Optional[Response] = None,
+    status_code: int = 200,
+) -> Response:
+    """
+    Validate ``data`` (ORM objects, rows or dicts) once and serialize it to bytes.
+
+    Headers already set on the injected ``response`` (ETag, Cache-Control,
+    cookies, ...) are carried over, since FastAPI only merges them into
+    responses it builds itself.
+    """
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    out = Response(content=body, status_code=status_code, media_type="application/json")
+    if response is not None:
+        out.raw_headers.extend(
+            (k, v) for k, v in response.raw_headers if k not in _SKIP_HEADERS
+        )
+    return out
@@ -0,0 +1,202 @@
+# app/core/sql_metrics.py
+"""
+Per-request SQL instrumentation.
+
+Engine events time every statement. While a request is in flight
+(``SQLInstrumentationMiddleware``) the numbers accumulate in a context-local
+``RequestSQL``: statement count, total DB time and the slowest statement.
+When the request finishes they are folded into per-route totals (served at
+/ops/sql) and, outside production, sent back as a ``Server-Timing`` header.
+
+Statements slower than ``SQL_SLOW_QUERY_MS`` are logged to ``app.sql.slow``
+with their normalized SQL and the originating route, request or not.
+"""
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+slow_logger = logging.getLogger("app.sql.slow")
+
+MAX_SQL_LENGTH = 1000
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%\(\w+\)s|%s|\$\d+")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LISTS = re.compile(r"(VALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace, literals, bind markers and IN/VALUES lists so equal queries group together."""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _LITERALS.sub("?", sql)
+    sql = _IN_LISTS.sub("(...)", sql)
+    sql = _VALUES_LISTS.sub(r"\1, ...", sql)
+    return sql[:MAX_SQL_LENGTH]
+
+
+class RequestSQL:
+    __slots__ = ("scope", "count", "total_seconds", "slowest_seconds", "slowest_sql")
+
+    def __init__(self, scope: dict) -> None:
+        self.scope = scope
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_sql: Optional[str] = None
+
+    @property
+    def route(self) -> str:
+        return route_of(self.scope)
+
+
+def route_of(scope: dict) -> str:
+    """Route template once routing has run ("/api/quests/{quest_id}"), else the raw path."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+
+_current: ContextVar[Optional[RequestSQL]] = ContextVar("request_sql", default=None)
+
+
+def current_request_sql() -> Optional[RequestSQL]:
+    return _current.get()
+
+
+# ---------- Engine events ----------
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_seconds += elapsed
+        if elapsed > stats.slowest_seconds:
+            stats.slowest_seconds = elapsed
+            stats.slowest_sql = statement
+
+    if elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        route = stats.route if stats is not None else None
+        sql = normalize_sql(statement)
+        slow_logger.warning(
+            "Slow query %.1f ms on %s: %s", elapsed * 1000, route or "<background>", sql,
+            extra={"slow_query": {
+                "duration_ms": round(elapsed * 1000, 2),
+                "route": route,
+                "method": stats.scope.get("method") if stats is not None else None,
+                "sql": sql,
+                "executemany": executemany,
+            }},
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _query_start_error(exception_context):
+    # after_cursor_execute never runs for a failed statement; drop its start time
+    conn = exception_context.connection
+    starts = conn.info.get("query_start") if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+# ---------- Per-route totals ----------
+
+class RouteSQLTotals:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict] = {}
+
+    def record(self, method: str, stats: RequestSQL) -> None:
+        key = f"{method} {stats.route}"
+        with self._lock:
+            totals = self._routes.get(key)
+            if totals is None:
+                totals = self._routes[key] = {
+                    "requests": 0, "statements": 0, "max_statements": 0,
+                    "db_seconds": 0.0, "slowest_seconds": 0.0, "slowest_sql": None,
+                }
+            totals["requests"] += 1
+            totals["statements"] += stats.count
+            totals["max_statements"] = max(totals["max_statements"], stats.count)
+            totals["db_seconds"] += stats.total_seconds
+            if stats.slowest_seconds > totals["slowest_seconds"]:
+                totals["slowest_seconds"] = stats.slowest_seconds
+                totals["slowest_sql"] = stats.slowest_sql
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            items = [(key, dict(totals)) for key, totals in self._routes.items()]
+        rows = []
+        for key, t in items:
+            rows.append({
+                "route": key,
+                "requests": t["requests"],
+                "statements": t["statements"],
+                "avg_statements": round(t["statements"] / t["requests"], 2),
+                "max_statements": t["max_statements"],
+                "db_ms": round(t["db_seconds"] * 1000, 2),
+                "avg_db_ms": round(t["db_seconds"] * 1000 / t["requests"], 3),
+                "slowest_ms": round(t["slowest_seconds"] * 1000, 2),
+                "slowest_sql": normalize_sql(t["slowest_sql"]) if t["slowest_sql"] else None,
+            })
+        return sorted(rows, key=lambda r: r["db_ms"], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_sql_totals = RouteSQLTotals()
+
+
+# ---------- Middleware ----------
+
+def _server_timing(stats: RequestSQL) -> bytes:
+    value = f'db;dur={stats.total_seconds * 1000:.2f};desc="{stats.count} queries"'
+    if stats.count:
+        value += f', db-slowest;dur={stats.slowest_seconds * 1000:.2f}'
+    return value.encode("latin-1")
+
+
+class SQLInstrumentationMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSQL(scope)
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING:
+                message["headers"] = [*message.get("headers", []), (b"server-timing", _server_timing(stats))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            if "route" in scope:  # skip 404s so unknown paths cannot grow the table
+                route_sql_totals.record(scope["method"], stats)
@@ -0,0 +1,332 @@
+# app/core/tracing.py
+"""
+Lightweight request tracing.
+
+``TracingMiddleware`` opens a root span per request (continuing an incoming
+W3C ``traceparent`` when present). Child spans come from:
+
+- every SQL statement (engine events below),
+- ``observe_dependency`` (Neynar, Optimism RPC, S3, DeepAI, Twitter),
+- ``start_span`` around CPU-heavy work such as signature checks.
+
+Spans live in a context variable, so they follow the request into the
+threadpool. When the root span ends, tail sampling decides whether the
+trace is kept: errors and traces slower than TRACE_SLOW_MS always are,
+the rest with probability TRACE_SAMPLE_RATE. Kept traces are encoded as
+OTLP/JSON and handed to a background exporter that appends them to
+TRACE_FILE or POSTs them to TRACE_OTLP_ENDPOINT (any OTLP/HTTP collector).
+
+Every log record gets ``trace_id`` / ``span_id`` attributes (empty outside
+a trace) through the log record factory.
+"""
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.sql_metrics import normalize_sql, route_of
+
+logger = logging.getLogger(__name__)
+
+MAX_SPANS_PER_TRACE = 1000
+EXPORT_QUEUE_SIZE = 1000
+EXPORT_BATCH_SIZE = 50
+
+SPAN_KIND_INTERNAL, SPAN_KIND_SERVER, SPAN_KIND_CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Trace:
+    __slots__ = ("trace_id", "spans", "dropped", "lock")
+
+    def __init__(self, trace_id: str) -> None:
+        self.trace_id = trace_id
+        self.spans: list["Span"] = []
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], kind: int, attributes: dict) -> None:
+        self.trace = trace
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.status = STATUS_OK
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.status = STATUS_ERROR
+            self.attributes["exception.type"] = error.__class__.__name__
+        trace = self.trace
+        with trace.lock:
+            if len(trace.spans) < MAX_SPANS_PER_TRACE:
+                trace.spans.append(self)
+            else:
+                trace.dropped += 1
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace.trace_id if span is not None else None
+
+
+@contextmanager
+def start_span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """Child span of the current one; a no-op (yields None) outside a traced request."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    span = Span(parent.trace, name, parent.span_id, kind, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.end(error=e)
+        raise
+    else:
+        span.end()
+    finally:
+        _current_span.reset(token)
+
+
+# ---------- SQL spans ----------
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _sql_span_start(conn, cursor, statement, parameters, context, executemany):
+    parent = _current_span.get()
+    if parent is None:
+        return
+    span = Span(parent.trace, "db.query", parent.span_id, SPAN_KIND_CLIENT, {
+        "db.system": "postgresql",
+        "db.statement": normalize_sql(statement),
+        "db.executemany": executemany,
+    })
+    conn.info.setdefault("trace_spans", []).append(span)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _sql_span_end(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        spans.pop().end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _sql_span_error(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    if spans:
+        spans.pop().end(error=exception_context.original_exception)
+
+
+# ---------- Log correlation ----------
+
+_base_record_factory = logging.getLogRecordFactory()
+
+
+def _record_factory(*args, **kwargs):
+    record = _base_record_factory(*args, **kwargs)
+    span = _current_span.get()
+    record.trace_id = span.trace.trace_id if span is not None else ""
+    record.span_id = span.span_id if span is not None else ""
+    return record
+
+
+logging.setLogRecordFactory(_record_factory)
+
+
+# ---------- Export ----------
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+def encode_otlp(traces: list[Trace]) -> dict:
+    spans = []
+    for trace in traces:
+        for span in trace.spans:
+            encoded = {
+                "traceId": trace.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": span.kind,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [_attribute(k, v) for k, v in span.attributes.items() if v is not None],
+                "status": {"code": span.status},
+            }
+            if span.parent_id:
+                encoded["parentSpanId"] = span.parent_id
+            spans.append(encoded)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", settings.TRACE_SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+class TraceExporter:
+    """Background thread that ships kept traces without blocking requests."""
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, trace: Trace) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            batch = [t for t in batch if t is not None]
+            if batch:
+                try:
+                    self._export(batch)
+                except Exception as e:
+                    logger.warning("Trace export failed (%d traces dropped): %s", len(batch), e)
+            if stop:
+                return
+
+    def _export(self, batch: list[Trace]) -> None:
+        if settings.TRACE_EXPORTER == "file":
+            with open(settings.TRACE_FILE, "a") as f:
+                for trace in batch:
+                    f.write(json.dumps(encode_otlp([trace]), separators=(",", ":")) + "\n")
+        elif settings.TRACE_EXPORTER == "otlp":
+            import httpx
+            httpx.post(settings.TRACE_OTLP_ENDPOINT, json=encode_otlp(batch), timeout=5.0).raise_for_status()
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+exporter = TraceExporter()
+
+
+def _keep(root: Span) -> bool:
+    if root.status == STATUS_ERROR or root.duration_ms >= settings.TRACE_SLOW_MS:
+        return True
+    return random.random() < settings.TRACE_SAMPLE_RATE
+
+
+# ---------- Middleware ----------
+
+def _incoming_parent(scope) -> tuple[Optional[str], Optional[str]]:
+    for key, value in scope.get("headers", []):
+        if key == b"traceparent":
+            match = _TRACEPARENT.match(value.decode("latin-1").strip())
+            if match and match.group(1) != "0" * 32:
+                return match.group(1), match.group(2)
+    return None, None
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = _incoming_parent(scope)
+        trace = Trace(trace_id or _new_id(128))
+        root = Span(trace, "request", parent_id, SPAN_KIND_SERVER, {
+            "http.method": scope["method"],
+            "http.target": scope.get("path", ""),
+        })
+        token = _current_span.set(root)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-trace-id", trace.trace_id.encode())]
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(token)
+            route = route_of(scope) if "route" in scope else None
+            root.name = f"{scope['method']} {route or '<unmatched>'}"
+            root.set_attribute("http.route", route)
+            root.set_attribute("http.status_code", status)
+            if status >= 500 and error is None:
+                root.status = STATUS_ERROR
+            root.end(error=error)
+            if trace.dropped:
+                root.set_attribute("trace.dropped_spans", trace.dropped)
+            if _keep(root):
+                exporter.submit(trace)
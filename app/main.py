@@ -1,15 +1,69 @@
 # app/main.py
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
-from app.routers import auth, farcaster, farcaster_claim, quest_routes, user_routes, project, glaria_quest, farcaster_quests
-from app.database import engine, Base
+from app.core.log import configure_logging, shutdown_logging
+from app.core.metrics import MetricsMiddleware
+from app.core.replica import ReadYourWritesMiddleware
+from app.core.sql_metrics import SQLInstrumentationMiddleware
+from app.core import tracing
+from app.routers import auth, exports, farcaster, farcaster_claim, ops, quest_routes, user_routes, project, glaria_quest, farcaster_quests
+from app.services.images import image_jobs
+from app.services.nft import nft_jobs
+from app.services.xp_buffer import xp_buffer
 
 load_dotenv()
 
-app = FastAPI(title=settings.APP_NAME)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # JSON logs for app.* through a background writer thread (detached again at shutdown)
+    configure_logging()
+
+    # Schema is managed by Alembic (see alembic.ini / migrations/)
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        from app.core.migrations import upgrade_to_head
+        await run_in_threadpool(upgrade_to_head)
+
+    if settings.XP_WRITE_BEHIND:
+        xp_buffer.start(settings.XP_FLUSH_INTERVAL_MS, settings.XP_RECOVERY_GRACE_SECONDS)
+
+    if settings.BULKHEADS_ENABLED:
+        from app.core.bulkhead import set_threadpool_size
+        set_threadpool_size(settings.THREADPOOL_SIZE)
+
+    nft_jobs.start()
+    image_jobs.start()
+
+    if settings.PREWARM_IMPORTS:
+        from app.core.prewarm import start_prewarm
+        start_prewarm()
+
+    yield
+
+    await nft_jobs.stop()
+    await image_jobs.stop()
+    await run_in_threadpool(xp_buffer.stop)  # final flush
+    await run_in_threadpool(tracing.exporter.shutdown)
+    shutdown_logging()
+
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
+
+# Per-dependency concurrency caps (innermost: rate-limited requests never take a slot)
+if settings.BULKHEADS_ENABLED:
+    from app.core.bulkhead import BulkheadMiddleware
+    app.add_middleware(BulkheadMiddleware)
+
+# Per-caller limits on expensive routes (added before CORS so CORS headers wrap its 429s)
+if settings.RATE_LIMIT_ENABLED:
+    from app.core.ratelimit import RateLimitMiddleware
+    app.add_middleware(RateLimitMiddleware)
 
 # CORS with credentials (for cookie sessions)
 app.add_middleware(
@@ -20,6 +74,24 @@ app.add_middleware(
     allow_headers=settings.ALLOW_HEADERS,
 )
 
+# Pins callers to the primary for a few seconds after they write (no-op without a replica)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Request latency / status / in-flight by route template (reads the SQL stats, so added inside them)
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in profiling (X-Profile + X-Ops-Token, or PROFILE_SAMPLE_ROUTES)
+if settings.PROFILING_ENABLED:
+    from app.core.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+
+# Per-request statement count / DB time, slow-query log, Server-Timing outside production
+app.add_middleware(SQLInstrumentationMiddleware)
+
+# Root span per request, tail-sampled export (outermost so it times everything)
+if settings.TRACE_EXPORTER != "none":
+    app.add_middleware(tracing.TracingMiddleware)
+
 @app.get("/")
 def read_root():
     return {"message": "GLARIA backend running 🚀"}
@@ -33,9 +105,9 @@ app.include_router(glaria_quest.router)
 app.include_router(farcaster.router)
 app.include_router(farcaster_quests.router)
 app.include_router(farcaster_claim.router)
-
-# Create DB tables
-Base.metadata.create_all(bind=engine)
+app.include_router(exports.router)
+app.include_router(ops.router, include_in_schema=False)
+app.include_router(ops.metrics_router, include_in_schema=False)
 
 # OpenAPI: keep your existing helper
 from fastapi.openapi.utils import get_openapi
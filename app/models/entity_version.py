@@ -0,0 +1,9 @@
+from sqlalchemy import BigInteger, Column, String
+from app.database import Base
+
+
+class EntityVersion(Base):
+    __tablename__ = "entity_versions"
+
+    name = Column(String, primary_key=True)                # versioned collection, e.g. "projects"
+    version = Column(BigInteger, nullable=False, default=0)  # bumped on every write to the collection
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Boolean, Text, func
+from sqlalchemy import JSON, Column, ForeignKey, Integer, String, DateTime, Boolean, Text, UniqueConstraint, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -30,7 +30,7 @@ class FarcasterUser(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # No ownership of projects anymore
-    completed_quests = relationship("FarcasterUserCompletedQuest", back_populates="user", cascade="all, delete-orphan")
+    completed_quests = relationship("FarcasterUserCompletedQuest", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
 # === Projects ===
 
@@ -46,10 +46,11 @@ class FarcasterProject(Base):
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     image_url = Column(String(512), nullable=True)
+    image_variants = Column(JSON, nullable=True)  # {"thumb": url, "card": url}, filled in by the image worker
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    quests = relationship("FarcasterQuest", back_populates="project", cascade="all, delete-orphan")
+    quests = relationship("FarcasterQuest", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
 
 # === Quests ===
 
@@ -64,20 +65,20 @@ class FarcasterQuest(Base):
     target_url = Column(String(512), nullable=True)
     points = Column(Integer, default=10)
 
-    project_id = Column(Integer, ForeignKey("farcaster_projects.id"), nullable=True)
+    project_id = Column(Integer, ForeignKey("farcaster_projects.id", ondelete="CASCADE"), nullable=True, index=True)
     project = relationship("FarcasterProject", back_populates="quests")
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    actions = relationship("FarcasterQuestAction", back_populates="quest", cascade="all, delete-orphan")
-    completions = relationship("FarcasterUserCompletedQuest", back_populates="quest", cascade="all, delete-orphan")
+    actions = relationship("FarcasterQuestAction", back_populates="quest", cascade="all, delete-orphan", passive_deletes=True)
+    completions = relationship("FarcasterUserCompletedQuest", back_populates="quest", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class FarcasterQuestAction(Base):
     __tablename__ = "farcaster_quest_actions"
 
     id = Column(Integer, primary_key=True, index=True)
-    quest_id = Column(Integer, ForeignKey("farcaster_quests.id"), nullable=False)
+    quest_id = Column(Integer, ForeignKey("farcaster_quests.id", ondelete="CASCADE"), nullable=False)
     type = Column(String(100), nullable=False)
     target_url = Column(String(512), nullable=True)
 
@@ -89,10 +90,12 @@ class FarcasterUserCompletedQuest(Base):
 
     id = Column(Integer, primary_key=True, index=True)
 
-    farcaster_user_id = Column(Integer, ForeignKey("farcaster_users.id"), nullable=False)
-    quest_id = Column(Integer, ForeignKey("farcaster_quests.id"), nullable=False)
+    farcaster_user_id = Column(Integer, ForeignKey("farcaster_users.id", ondelete="CASCADE"), nullable=False)
+    quest_id = Column(Integer, ForeignKey("farcaster_quests.id", ondelete="CASCADE"), nullable=False)
     quest_type = Column(String(50), nullable=False)
     completed_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("FarcasterUser", back_populates="completed_quests")
-    quest = relationship("FarcasterQuest", back_populates="completions")
\ No newline at end of file
+    quest = relationship("FarcasterQuest", back_populates="completions")
+
+    __table_args__ = (UniqueConstraint("farcaster_user_id", "quest_id", name="uq_farcaster_user_quest"),)
\ No newline at end of file
@@ -2,7 +2,7 @@ from enum import Enum
 from app.database import Base
 from sqlalchemy.orm import relationship
 
-from sqlalchemy import Column, DateTime, Integer, String, Enum as SQLEnum, Text, func
+from sqlalchemy import JSON, Column, DateTime, Integer, String, Enum as SQLEnum, Text, func
 from app.schemas.project_schema import ProjectTypeEnum
 
 
@@ -27,6 +27,7 @@ class Project(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     image_url = Column(String, nullable=True)  # Store S3 URL of the project's logo/banner
+    image_variants = Column(JSON, nullable=True)  # {"thumb": url, "card": url}, filled in by the image worker
     discord_url = Column(String, nullable=True)
     telegram_url = Column(String, nullable=True)
     twitter_url = Column(String, nullable=True)
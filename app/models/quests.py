@@ -7,14 +7,14 @@ class Quest(Base):
     __tablename__ = "quests"
 
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=False)
     points = Column(Integer, default=0)
     project_points = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    actions = relationship("QuestAction", back_populates="quest", cascade="all, delete-orphan")
+    actions = relationship("QuestAction", back_populates="quest", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class QuestAction(Base):
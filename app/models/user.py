@@ -1,5 +1,5 @@
 # models/user.py
-from sqlalchemy import Column, Integer, String, Text, UniqueConstraint
+from sqlalchemy import JSON, Column, Integer, String, Text, UniqueConstraint
 from app.database import Base
 
 class User(Base):
@@ -9,7 +9,8 @@ class User(Base):
     username = Column(String, unique=True, index=True, nullable=False)  # required & unique
     email = Column(String, nullable=True)
     twitter_id = Column(String, unique=True, nullable=True)             # from X
-    twitter_username = Column(String, nullable=True)                    # from X
+    twitter_username = Column(String, nullable=True, index=True)        # from X
     wallet_address = Column(String, unique=True, nullable=True)         # if user connects wallet
     xp = Column(Integer, default=100)
     nft_image_url = Column(String, nullable=True)  # stores the S3 URL of the NFT
+    nft_image_variants = Column(JSON, nullable=True)  # resized copies of nft_image_url
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Enum, Integer, ForeignKey, DateTime, String, UniqueConstraint, func
+from sqlalchemy import Boolean, Column, Enum, Index, Integer, ForeignKey, DateTime, String, UniqueConstraint, false, func, text
 from app.database import Base
 
 class QuestTypeEnum(str, enum.Enum):
@@ -14,4 +14,9 @@ class UserCompletedQuest(Base):
     quest_id = Column(Integer, nullable=False)
     quest_type = Column(Enum(QuestTypeEnum), nullable=False)
     collected_at = Column(DateTime, server_default=func.now())
-    __table_args__ = (UniqueConstraint("user_id", "quest_id", "quest_type", name="_user_quest_uc"),)
\ No newline at end of file
+    xp_pending = Column(Boolean, nullable=False, server_default=false())  # XP not applied yet (write-behind mode)
+    __table_args__ = (
+        UniqueConstraint("user_id", "quest_id", "quest_type", name="_user_quest_uc"),
+        Index("ix_user_completed_quests_quest", "quest_id", "quest_type"),  # orphan cleanup after quest deletes
+        Index("ix_user_completed_quests_xp_pending", "id", postgresql_where=text("xp_pending")),
+    )
\ No newline at end of file
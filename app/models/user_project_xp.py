@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Index, Integer, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -10,4 +10,7 @@ class UserProjectXP(Base):
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"))
     xp = Column(Integer, default=0)
 
-    __table_args__ = (UniqueConstraint("user_id", "project_id", name="user_project_unique"),)
\ No newline at end of file
+    __table_args__ = (
+        UniqueConstraint("user_id", "project_id", name="user_project_unique"),
+        Index("ix_user_project_xp_project_xp", "project_id", "xp"),  # per-project leaderboard
+    )
\ No newline at end of file
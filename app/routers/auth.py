@@ -15,16 +15,14 @@ from app.models.twitter_token import TwitterToken
 from app.models.user import User
 
 from app.auth.token import create_access_token, get_current_user
-
-from eth_account.messages import defunct_hash_message
-from eth_account import Account
+from app.core.metrics import observe_dependency
+from app.core.tracing import start_span
 
 
 from typing import Optional
 from fastapi import Query
 from fastapi.responses import RedirectResponse
 
-from eth_account.messages import encode_defunct
 load_dotenv()
 router = APIRouter()
 
@@ -85,16 +83,17 @@ async def twitter_callback(
 
     async with httpx.AsyncClient() as client:
         # 1. Exchange code for access token
-        res = await client.post(
-            "https://api.twitter.com/2/oauth2/token",
-            data={
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": redirect_uri,
-                "code_verifier": verifier
-            },
-            headers=headers,
-        )
+        with observe_dependency("twitter", "oauth2_token"):
+            res = await client.post(
+                "https://api.twitter.com/2/oauth2/token",
+                data={
+                    "code": code,
+                    "grant_type": "authorization_code",
+                    "redirect_uri": redirect_uri,
+                    "code_verifier": verifier
+                },
+                headers=headers,
+            )
         token_data = res.json()
         access_token = token_data.get("access_token")
         refresh_token = token_data.get("refresh_token")
@@ -103,19 +102,21 @@ async def twitter_callback(
             return {"error": "Failed to retrieve access token.", "details": token_data}
 
         # 2. Get user ID and username
-        user_res = await client.get(
-            "https://api.twitter.com/2/users/me",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
+        with observe_dependency("twitter", "users_me"):
+            user_res = await client.get(
+                "https://api.twitter.com/2/users/me",
+                headers={"Authorization": f"Bearer {access_token}"}
+            )
         user_data = user_res.json()
         twitter_id = user_data.get("data", {}).get("id")
         twitter_username = user_data.get("data", {}).get("username")
 
         # 3. Get profile image URL
-        image_res = await client.get(
-            f"https://api.twitter.com/2/users/{twitter_id}?user.fields=profile_image_url",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
+        with observe_dependency("twitter", "user_lookup"):
+            image_res = await client.get(
+                f"https://api.twitter.com/2/users/{twitter_id}?user.fields=profile_image_url",
+                headers={"Authorization": f"Bearer {access_token}"}
+            )
         image_data = image_res.json()
         profile_image_url = image_data.get("data", {}).get("profile_image_url", "")
         if profile_image_url:
@@ -142,6 +143,7 @@ async def twitter_callback(
         jwt_token = None
         if user_exists:
             existing_user.nft_image_url = profile_image_url  # ✅ Save image to DB
+            existing_user.nft_image_variants = None
             db.commit()
             jwt_token = create_access_token(data={"sub": str(existing_user.id)})
 
@@ -208,10 +210,13 @@ async def wallet_connect(
 
     # Step 2: Verify signature
     message = f"Sign this nonce to authenticate: {db_nonce.nonce}"
+    from eth_account import Account  # lazy: eth_account is heavy and only wallet linking needs it
+    from eth_account.messages import encode_defunct
     encoded = encode_defunct(text=message)
 
     try:
-        recovered = Account.recover_message(encoded, signature=signature)
+        with start_span("eth_account.recover_message"):
+            recovered = Account.recover_message(encoded, signature=signature)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Signature verification failed: {str(e)}")
 
@@ -0,0 +1,184 @@
+# routers/exports.py
+"""
+Streaming exports of project standings and quest completions.
+
+Rows are read through a server-side cursor (``yield_per``) and encoded one
+batch at a time, so memory stays flat regardless of project size. The
+generator is pulled by ``StreamingResponse`` only as fast as the client
+drains the socket, which gives slow clients natural backpressure.
+
+Exports contain participants' wallets and handles. Farcaster projects have an
+owner (``fid``), so only that owner may export them; Glaria projects have no
+owner column, so their exports need the ops token.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Iterator, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.auth.token import get_current_user
+from app.core.replica import read_sessionmaker
+from app.database import get_db
+from app.models.farcaster import FarcasterProject, FarcasterQuest, FarcasterUser, FarcasterUserCompletedQuest
+from app.models.project import Project
+from app.models.quests import Quest
+from app.models.user import User
+from app.models.user_completed_quest import QuestTypeEnum, UserCompletedQuest
+from app.models.user_project_xp import UserProjectXP
+from app.routers.ops import require_ops_token
+
+router = APIRouter(tags=["Exports"])
+
+EXPORT_BATCH_SIZE = 1000
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_ndjson(columns: list[str], rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _encode_csv(rows) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(
+        [v.isoformat() if isinstance(v, (datetime, date)) else v for v in row] for row in rows
+    )
+    return buf.getvalue()
+
+
+def _stream_rows(stmt: Select, fmt: ExportFormat, session_factory: sessionmaker) -> Iterator[str]:
+    # The request-scoped session from get_db is closed before the body is sent,
+    # so the stream owns its own session (replica when healthy) for the lifetime of the cursor.
+    db = session_factory()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        columns = list(result.keys())
+        if fmt == "csv":
+            yield _encode_csv([columns])
+        for batch in result.partitions():
+            yield _encode_ndjson(columns, batch) if fmt == "ndjson" else _encode_csv(batch)
+    finally:
+        db.close()
+
+
+def _export_response(request: Request, stmt: Select, fmt: ExportFormat, filename: str) -> StreamingResponse:
+    ext = "csv" if fmt == "csv" else "ndjson"
+    return StreamingResponse(
+        _stream_rows(stmt, fmt, read_sessionmaker(request)),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{ext}"',
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+@router.get("/projects/{project_id}/export/xp")
+def export_project_xp(
+    project_id: int,
+    request: Request,
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_ops_token),
+):
+    if not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    stmt = (
+        select(
+            User.id.label("user_id"),
+            User.username,
+            User.twitter_username,
+            User.wallet_address,
+            UserProjectXP.xp.label("project_xp"),
+        )
+        .join(User, User.id == UserProjectXP.user_id)
+        .where(UserProjectXP.project_id == project_id)
+        .order_by(UserProjectXP.xp.desc(), UserProjectXP.user_id)
+    )
+    return _export_response(request, stmt, fmt, f"project-{project_id}-xp")
+
+
+@router.get("/projects/{project_id}/export/completions")
+def export_project_completions(
+    project_id: int,
+    request: Request,
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_ops_token),
+):
+    if not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    stmt = (
+        select(
+            User.id.label("user_id"),
+            User.username,
+            User.twitter_username,
+            User.wallet_address,
+            Quest.id.label("quest_id"),
+            Quest.title.label("quest_title"),
+            UserCompletedQuest.collected_at,
+        )
+        .join(Quest, Quest.id == UserCompletedQuest.quest_id)
+        .join(User, User.id == UserCompletedQuest.user_id)
+        .where(
+            Quest.project_id == project_id,
+            UserCompletedQuest.quest_type == QuestTypeEnum.project,
+        )
+        .order_by(UserCompletedQuest.id)
+    )
+    return _export_response(request, stmt, fmt, f"project-{project_id}-completions")
+
+
+@router.get("/farcaster/projects/{project_id}/export/completions")
+def export_farcaster_completions(
+    project_id: int,
+    request: Request,
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    db: Session = Depends(get_db),
+    user: FarcasterUser = Depends(get_current_user)
+):
+    project = db.query(FarcasterProject.id, FarcasterProject.fid).filter(FarcasterProject.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.fid != user.fid:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    stmt = (
+        select(
+            FarcasterUser.fid,
+            FarcasterUser.username,
+            FarcasterUser.display_name,
+            FarcasterUser.custody_address,
+            FarcasterQuest.id.label("quest_id"),
+            FarcasterQuest.title.label("quest_title"),
+            FarcasterUserCompletedQuest.quest_type,
+            FarcasterUserCompletedQuest.completed_at,
+        )
+        .join(FarcasterQuest, FarcasterQuest.id == FarcasterUserCompletedQuest.quest_id)
+        .join(FarcasterUser, FarcasterUser.id == FarcasterUserCompletedQuest.farcaster_user_id)
+        .where(FarcasterQuest.project_id == project_id)
+        .order_by(FarcasterUserCompletedQuest.id)
+    )
+    return _export_response(request, stmt, fmt, f"farcaster-project-{project_id}-completions")
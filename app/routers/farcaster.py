@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Form, UploadFile, File, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Form, UploadFile, File, Depends, HTTPException, Request, status, Response
 from fastapi.responses import JSONResponse
 from typing import Optional, List, Any
 from datetime import datetime, timezone
@@ -6,12 +6,17 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, select
 from pydantic import BaseModel
 from app.database import get_db
-from app.auth.token import get_current_user
+from app.auth.token import get_current_user, get_current_user_read
+from app.core.http_cache import DETAIL_CACHE, conditional_get
+from app.core.replica import get_read_db
+from app.core.serialization import json_response
 from app.models.farcaster import (
     FarcasterProject, FarcasterQuest, FarcasterUser, FarcasterUserCompletedQuest
 )
-from app.schemas.farcaster import FarcasterQuestOut, FarcasterQuestSchema, ProjectOut, ProjectListItem
-from app.utils.s3 import upload_image_to_s3
+from app.schemas.farcaster import FarcasterQuestOut, FarcasterQuestSchema, ProjectOut, ProjectListAdapter, ProjectListItem
+from app.schemas.project_schema import ImageFinalizeRequest, ImageUploadRequest, ImageUploadTicket
+from app.utils.s3 import PROJECT_IMAGE_FOLDER, InvalidUpload, presign_image_upload, resolve_image_url, upload_image_to_s3
+from app.services.images import queue_image_variants
 from app.services.siwf import verify_message_and_get
 from app.core.config import settings
 from app.auth.token import create_access_token
@@ -118,7 +123,7 @@ def siwf_verify(payload: VerifyIn, db: Session = Depends(get_db), response: Resp
 
 
 @router.get("/me")
-def me(current_user: FarcasterUser = Depends(get_current_user)):
+def me(current_user: FarcasterUser = Depends(get_current_user_read)):
     return {
         "fid": current_user.fid,
         "custody_address": current_user.custody_address,
@@ -138,6 +143,15 @@ def logout(response: Response):
     return {"detail": "Logged out"}
 
 
+@router.post("/image-upload", response_model=ImageUploadTicket)
+def create_image_upload(payload: ImageUploadRequest, user: FarcasterUser = Depends(get_current_user)):
+    """Presigned POST for uploading a project image straight to S3; pass the key on create or finalize."""
+    try:
+        return presign_image_upload(PROJECT_IMAGE_FOLDER, payload.content_type)
+    except InvalidUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/")
 def create_project(
     name: str = Form(...),
@@ -146,7 +160,8 @@ def create_project(
     discord_url: Optional[str] = Form(None),
     telegram_url: Optional[str] = Form(None),
     twitter_url: Optional[str] = Form(None),
-    image: UploadFile = File(...),
+    image: Optional[UploadFile] = File(None),
+    image_key: Optional[str] = Form(None),
     db: Session = Depends(get_db),
     user: FarcasterUser = Depends(get_current_user)
 ):
@@ -160,8 +175,9 @@ def create_project(
     if empty_fields:
         return JSONResponse(status_code=400, content={"message": f"Empty fields: {', '.join(empty_fields)}"})
 
-
-    image_url = upload_image_to_s3(image)
+    image_url = resolve_image_url(image, image_key)
+    if image_url is None:
+        return JSONResponse(status_code=400, content={"message": "Send an image file or the image_key of a direct upload"})
 
     new_project = FarcasterProject(
         name=name.strip(),
@@ -177,8 +193,9 @@ def create_project(
     db.add(new_project)
     db.commit()
     db.refresh(new_project)
+    queue_image_variants("farcaster_projects", new_project.id, new_project.image_url)
 
-    return {"message": "Project created", "project": ProjectOut.from_orm(new_project)}
+    return {"message": "Project created", "project": ProjectOut.model_validate(new_project)}
 
 
 @router.put("/{project_id}", response_model=ProjectOut)
@@ -203,6 +220,7 @@ def update_project(
 
     if image:
         project.image_url = upload_image_to_s3(image)
+        project.image_variants = None
 
     for field, value in {
         "name": name,
@@ -217,6 +235,30 @@ def update_project(
 
     db.commit()
     db.refresh(project)
+    if image:
+        queue_image_variants("farcaster_projects", project.id, project.image_url)
+    return project
+
+
+@router.put("/{project_id}/image", response_model=ProjectOut)
+def finalize_project_image(
+    project_id: int,
+    payload: ImageFinalizeRequest,
+    db: Session = Depends(get_db),
+    user: FarcasterUser = Depends(get_current_user)
+):
+    project = db.query(FarcasterProject).get(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    if project.fid != user.fid:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    project.image_url = resolve_image_url(None, payload.key)
+    project.image_variants = None
+    db.commit()
+    db.refresh(project)
+    queue_image_variants("farcaster_projects", project.id, project.image_url)
     return project
 
 
@@ -238,12 +280,18 @@ def delete_project(
 
 
 @router.get("/projects", response_model=List[ProjectListItem])
-def get_all_projects(db: Session = Depends(get_db)):
-    return db.query(FarcasterProject).all()
+def get_all_projects(request: Request, response: Response, db: Session = Depends(get_read_db)):
+    not_modified = conditional_get(request, response, db, "farcaster_projects")
+    if not_modified:
+        return not_modified
+    return json_response(ProjectListAdapter, db.query(FarcasterProject).all(), response)
 
 
 @router.get("/projects/{project_id}", response_model=ProjectOut)
-def get_project_by_id(project_id: int, db: Session = Depends(get_db)):
+def get_project_by_id(project_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    not_modified = conditional_get(request, response, db, "farcaster_projects", cache_control=DETAIL_CACHE)
+    if not_modified:
+        return not_modified
     project = db.query(FarcasterProject).get(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -1,4 +1,7 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from datetime import datetime
 
@@ -19,6 +22,8 @@ from app.services.farcaster_api import (
     has_followed_user,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/farcaster", tags=["Farcaster"])
 
 @router.post("/claimpoints", response_model=QuestClaimResponse)
@@ -55,8 +60,8 @@ def claim_points(
             is_valid = has_followed_user(user.fid, quest.target_url)
         else:
             raise HTTPException(status_code=400, detail=f"Unsupported quest type: {quest_type}")
-    except Exception as e:
-        print(f"[claim_points] Error verifying quest ({quest_type}) for fid={user.fid} at URL={quest.target_url} — {e}")
+    except Exception:
+        logger.exception("Error verifying %s quest %s for fid=%s (%s)", quest_type, quest.id, user.fid, quest.target_url)
         raise HTTPException(status_code=500, detail="Error verifying quest. Try again later.")
 
     if not is_valid:
@@ -70,7 +75,12 @@ def claim_points(
         completed_at=datetime.utcnow()
     )
     db.add(completion)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # uq_farcaster_user_quest: a concurrent claim for the same quest won the race
+        db.rollback()
+        raise HTTPException(status_code=400, detail="You already claimed this quest.")
     db.refresh(completion)  # Optional: if you want to return ID later
 
     return QuestClaimResponse(
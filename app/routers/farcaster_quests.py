@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
+from app.core.http_cache import DETAIL_CACHE, conditional_get
+from app.core.replica import get_read_db
+from app.core.serialization import json_response
 from app.database import get_db
 from app.models.farcaster import FarcasterQuest, FarcasterProject, FarcasterUser
-from app.schemas.farcaster import FarcasterQuestOut, FarcasterQuestSchema
+from app.schemas.farcaster import FarcasterQuestListAdapter, FarcasterQuestOut, FarcasterQuestSchema
 from pydantic import BaseModel
 from app.auth.token import get_current_user
+from app.services.quest_import import insert_quests, parse_import, read_import_body, validate_import
 
 router = APIRouter(prefix="/farcaster", tags=["Farcaster Quests"])
 
@@ -16,15 +21,21 @@ router = APIRouter(prefix="/farcaster", tags=["Farcaster Quests"])
 # Get all quests
 # =======================
 @router.get("/quests", response_model=List[FarcasterQuestOut])
-def get_all_quests(db: Session = Depends(get_db)):
-    return db.query(FarcasterQuest).all()
+def get_all_quests(request: Request, response: Response, db: Session = Depends(get_read_db)):
+    not_modified = conditional_get(request, response, db, "farcaster_quests")
+    if not_modified:
+        return not_modified
+    return json_response(FarcasterQuestListAdapter, db.query(FarcasterQuest).all(), response)
 
 
 # =======================
 # Get single quest by ID
 # =======================
 @router.get("/quests/{quest_id}", response_model=FarcasterQuestOut)
-def get_quest_by_id(quest_id: int, db: Session = Depends(get_db)):
+def get_quest_by_id(quest_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    not_modified = conditional_get(request, response, db, "farcaster_quests", cache_control=DETAIL_CACHE)
+    if not_modified:
+        return not_modified
     quest = db.query(FarcasterQuest).get(quest_id)
     if not quest:
         raise HTTPException(status_code=404, detail="Quest not found")
@@ -35,8 +46,12 @@ def get_quest_by_id(quest_id: int, db: Session = Depends(get_db)):
 # Get quests by project
 # =======================
 @router.get("/quests/project/{project_id}", response_model=List[FarcasterQuestOut])
-def get_quests_by_project(project_id: int, db: Session = Depends(get_db)):
-    return db.query(FarcasterQuest).filter(FarcasterQuest.project_id == project_id).all()
+def get_quests_by_project(project_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    not_modified = conditional_get(request, response, db, "farcaster_quests")
+    if not_modified:
+        return not_modified
+    quests = db.query(FarcasterQuest).filter(FarcasterQuest.project_id == project_id).all()
+    return json_response(FarcasterQuestListAdapter, quests, response)
 
 
 # =======================
@@ -75,4 +90,29 @@ def create_quest(
     db.add(quest)
     db.commit()
     db.refresh(quest)
-    return quest
\ No newline at end of file
+    return quest
+
+
+# =======================
+# Bulk import quests
+# =======================
+@router.post("/quests/bulk", status_code=201)
+async def bulk_create_quests(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: FarcasterUser = Depends(get_current_user),
+):
+    # JSON array of CreateQuestIn objects, or CSV (text/csv) with one quest per row
+    rows = parse_import(request.headers.get("content-type"), await read_import_body(request), nested_actions=False)
+
+    def _import():
+        quests = validate_import(db, rows, CreateQuestIn, FarcasterProject)
+        ids = insert_quests(
+            db, quests, FarcasterQuest, "farcaster_quests",
+            quest_fields=("title", "description", "type", "button_type", "target_url", "points", "project_id"),
+        )
+        db.commit()
+        return ids
+
+    quest_ids = await run_in_threadpool(_import)
+    return {"message": f"{len(quest_ids)} quests imported", "created": len(quest_ids), "quest_ids": quest_ids}
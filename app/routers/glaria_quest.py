@@ -1,9 +1,12 @@
-from sqlite3 import IntegrityError
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from app.core.http_cache import PRIVATE_CACHE, conditional_get
+from app.core.replica import get_read_db
+from app.core.serialization import json_response
 from app.database import get_db
 from app.models.glaria_quest import GlariaQuest
-from app.schemas.glaria_quest_schema import GlariaQuestCreate, GlariaQuestOut
+from app.schemas.glaria_quest_schema import GlariaQuestCreate, GlariaQuestListAdapter, GlariaQuestOut
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
@@ -12,15 +15,16 @@ from app.auth.token import get_current_user
 from app.models.user import User
 from app.models.glaria_quest import GlariaQuest
 from app.models.user_completed_quest import UserCompletedQuest, QuestTypeEnum
+from app.services.xp import collect_glaria_xp as collect_glaria_quest_xp
 
-from app.auth.token import get_current_user
+from app.auth.token import get_current_user, get_current_user_read
 
 router = APIRouter(prefix="/api/glaria-quests", tags=["Glaria Quests"])
 
 
 @router.post("/", response_model=GlariaQuestOut, status_code=201)
 def create_glaria_quest(quest: GlariaQuestCreate, db: Session = Depends(get_db)):
-    new_quest = GlariaQuest(**quest.dict())
+    new_quest = GlariaQuest(**quest.model_dump())
     db.add(new_quest)
     db.commit()
     db.refresh(new_quest)
@@ -29,29 +33,48 @@ def create_glaria_quest(quest: GlariaQuestCreate, db: Session = Depends(get_db))
 
 @router.get("/", response_model=List[GlariaQuestOut])
 def get_glaria_quests(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)  # optional if you want unauth access
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_user_read)  # optional if you want unauth access
 ):
-    quests = db.query(GlariaQuest).all()
-    result = []
+    # The completed flags depend on the caller, so their completions are part of the ETag
+    completion_mark = db.query(
+        func.count(UserCompletedQuest.id), func.max(UserCompletedQuest.id)
+    ).filter(
+        UserCompletedQuest.user_id == user.id,
+        UserCompletedQuest.quest_type == QuestTypeEnum.glaria,
+    ).one()
+    not_modified = conditional_get(
+        request, response, db, "glaria_quests",
+        extra=(user.id, *completion_mark),
+        cache_control=PRIVATE_CACHE,
+    )
+    if not_modified:
+        return not_modified
 
-    for quest in quests:
-        is_completed = db.query(UserCompletedQuest).filter_by(
-            user_id=user.id, quest_id=quest.id, quest_type=QuestTypeEnum.glaria
-        ).first() is not None
+    quests = db.query(GlariaQuest).all()
+    completed_ids = {
+        quest_id for (quest_id,) in db.query(UserCompletedQuest.quest_id).filter_by(
+            user_id=user.id, quest_type=QuestTypeEnum.glaria
+        )
+    }
 
-        result.append(GlariaQuestOut(
-        id=quest.id,
-        title=quest.title,
-        description=quest.description,
-        type=quest.type,
-        button_type=quest.button_type,
-        target_url=quest.target_url,
-        points=quest.points,
-        completed=is_completed
-        ))
+    result = [
+        {
+            "id": quest.id,
+            "title": quest.title,
+            "description": quest.description,
+            "type": quest.type,
+            "button_type": quest.button_type,
+            "target_url": quest.target_url,
+            "points": quest.points,
+            "completed": quest.id in completed_ids,
+        }
+        for quest in quests
+    ]
 
-    return result
+    return json_response(GlariaQuestListAdapter, result, response)
 
 
 
@@ -61,31 +84,17 @@ def collect_glaria_xp(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
-    # 1. Check if glaria quest exists
-    quest = db.query(GlariaQuest).filter(GlariaQuest.id == quest_id).first()
-    if not quest:
+    # Completion insert (ON CONFLICT DO NOTHING) and XP increment in one statement
+    award = collect_glaria_quest_xp(db, user.id, quest_id)
+    if award is None:
         raise HTTPException(status_code=404, detail="Glaria quest not found")
-
-    # 2. Check if already collected
-    already_collected = db.query(UserCompletedQuest).filter_by(
-        user_id=user.id, quest_id=quest_id, quest_type="glaria"
-    ).first()
-    if already_collected:
+    if not award.awarded:
+        db.rollback()
         raise HTTPException(status_code=409, detail="XP already collected for this glaria quest")
 
-    try:
-        # 3. Update XP and insert completion record in one go
-        user.xp += quest.points
-        db.add(UserCompletedQuest(
-            user_id=user.id, quest_id=quest.id, quest_type="glaria"
-        ))
-        db.commit()
-        db.refresh(user)
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=409, detail="XP already collected")
+    db.commit()
 
     return {
         "message": "XP successfully collected from Glaria quest",
-        "total_xp": user.xp
+        "total_xp": award.total_xp
     }
\ No newline at end of file
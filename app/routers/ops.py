@@ -0,0 +1,109 @@
+# routers/ops.py
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.pool_metrics import pool_snapshot
+from app.core.profiling import list_profiles, profile_path
+from app.core.replica import replica_health
+from app.core.sql_metrics import route_sql_totals
+from app.database import (
+    DB_APPLICATION_NAME, DB_MAX_OVERFLOW, DB_POOL_PRE_PING, DB_POOL_RECYCLE, DB_POOL_SIZE,
+    DB_POOL_TIMEOUT, DB_STATEMENT_TIMEOUT_MS, engine, replica_engine,
+)
+
+
+def require_ops_token(
+    x_ops_token: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    # Ops endpoints do not exist unless OPS_TOKEN is configured
+    if not settings.OPS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    token = x_ops_token
+    if not token and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    if not token or not hmac.compare_digest(token.encode(), settings.OPS_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid ops token")
+
+
+router = APIRouter(prefix="/ops", tags=["Ops"], dependencies=[Depends(require_ops_token)])
+
+# /metrics lives at the root where scrapers expect it (Prometheus: authorization.credentials = OPS_TOKEN)
+metrics_router = APIRouter(tags=["Ops"], dependencies=[Depends(require_ops_token)])
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/db-pool")
+def db_pool():
+    # 1. Pool gauges + checkout latency for this worker
+    result = {
+        "pool": pool_snapshot(engine.pool),
+        "replica_pool": pool_snapshot(replica_engine.pool) if replica_engine else None,
+        "replica_health": {
+            "healthy": replica_health.healthy,
+            "lag_seconds": replica_health.lag_seconds,
+        } if replica_engine else None,
+        "settings": {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pre_ping": DB_POOL_PRE_PING,
+            "statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS,
+            "application_name": DB_APPLICATION_NAME,
+        },
+    }
+
+    # 2. Server-side view: connections of every worker sharing the application name
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT coalesce(state, 'unknown') AS state, count(*) AS n "
+                    "FROM pg_stat_activity WHERE application_name = :name GROUP BY 1"
+                ),
+                {"name": DB_APPLICATION_NAME},
+            ).all()
+            max_connections = conn.execute(text("SHOW max_connections")).scalar()
+        result["db"] = {
+            "connections": {row.state: row.n for row in rows},
+            "max_connections": int(max_connections),
+        }
+    except Exception as e:
+        result["db"] = {"error": e.__class__.__name__}
+
+    return result
+
+
+@router.get("/sql")
+def sql_by_route(reset: bool = Query(False)):
+    # Per-route statement counts and DB time for this worker, heaviest first
+    routes = route_sql_totals.snapshot()
+    if reset:
+        route_sql_totals.reset()
+    return {"slow_query_ms": settings.SQL_SLOW_QUERY_MS, "routes": routes}
+
+
+@router.get("/profiles")
+def profiles():
+    # Folded stacks written by ProfilingMiddleware, newest first
+    return {"enabled": settings.PROFILING_ENABLED, "profiles": list_profiles()}
+
+
+@router.get("/profiles/{name}")
+def profile(name: str):
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=name)
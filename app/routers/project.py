@@ -1,20 +1,38 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Request, Response, UploadFile, status
 from fastapi.responses import JSONResponse
-from sqlalchemy import func
+from sqlalchemy import delete, func, select
 from sqlalchemy.orm import Session
+from app.core.http_cache import DETAIL_CACHE, bump_versions, conditional_get
+from app.core.replica import get_read_db
+from app.core.serialization import json_response
 from app.database import get_db
 from app.models.project import Project
 from app.models.quests import Quest
 from app.models.user_project_xp import UserProjectXP
-from app.schemas.project_schema import ProjectCreate, ProjectListItem, ProjectUpdate, ProjectOut
-from app.auth.token import get_current_user
+from app.schemas.project_schema import (
+    ImageFinalizeRequest, ImageUploadRequest, ImageUploadTicket,
+    ProjectCreate, ProjectListAdapter, ProjectListItem, ProjectUpdate, ProjectOut,
+)
+from app.auth.token import get_current_user, get_current_user_read
 from app.models.user import User
-from app.utils.s3 import upload_image_to_s3
+from app.services.cleanup import purge_orphan_completions
+from app.services.images import queue_image_variants
+from app.utils.s3 import PROJECT_IMAGE_FOLDER, InvalidUpload, presign_image_upload, resolve_image_url, upload_image_to_s3
 
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
+
+@router.post("/image-upload", response_model=ImageUploadTicket)
+def create_image_upload(payload: ImageUploadRequest, user: User = Depends(get_current_user)):
+    """Presigned POST for uploading a project image straight to S3; pass the key on create or finalize."""
+    try:
+        return presign_image_upload(PROJECT_IMAGE_FOLDER, payload.content_type)
+    except InvalidUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/")
 def create_project(
     name: str = Form(...),
@@ -23,7 +41,8 @@ def create_project(
     discord_url: Optional[str] = Form(None),
     telegram_url: Optional[str] = Form(None),
     twitter_url: Optional[str] = Form(None),
-    image: UploadFile = File(...),
+    image: Optional[UploadFile] = File(None),
+    image_key: Optional[str] = Form(None),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
@@ -51,8 +70,13 @@ def create_project(
             content={"message": "Twitter username already exists"}
         )
 
-    # Upload image to S3
-    image_url = upload_image_to_s3(image)
+    # Upload image to S3 (or check the one uploaded with a presigned POST)
+    image_url = resolve_image_url(image, image_key)
+    if image_url is None:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"message": "Send an image file or the image_key of a direct upload"}
+        )
 
     # Save project
     new_project = Project(
@@ -67,8 +91,9 @@ def create_project(
     db.add(new_project)
     db.commit()
     db.refresh(new_project)
+    queue_image_variants("projects", new_project.id, new_project.image_url)
 
-    return {"message": "Project successfully created", "project": ProjectOut.from_orm(new_project)}
+    return {"message": "Project successfully created", "project": ProjectOut.model_validate(new_project)}
 
 
 @router.put("/{project_id}", response_model=ProjectOut)
@@ -92,6 +117,7 @@ def update_project(
     if image:
         image_url = upload_image_to_s3(image)
         project.image_url = image_url
+        project.image_variants = None
 
     # Update other fields if provided
     for key, value in {
@@ -107,11 +133,14 @@ def update_project(
 
     db.commit()
     db.refresh(project)
+    if image:
+        queue_image_variants("projects", project.id, project.image_url)
     return project
 
-@router.delete("/{project_id}")
-def delete_project(
+@router.put("/{project_id}/image", response_model=ProjectOut)
+def finalize_project_image(
     project_id: int,
+    payload: ImageFinalizeRequest,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
@@ -119,20 +148,53 @@ def delete_project(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    project_name = project.name
-    db.delete(project)
+    project.image_url = resolve_image_url(None, payload.key)
+    project.image_variants = None
     db.commit()
+    db.refresh(project)
+    queue_image_variants("projects", project.id, project.image_url)
+    return project
+
+@router.delete("/{project_id}")
+def delete_project(
+    project_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    # Quests, actions and project XP go with the project via ON DELETE CASCADE
+    quest_ids = db.execute(select(Quest.id).where(Quest.project_id == project_id)).scalars().all()
+    project_name = db.execute(
+        delete(Project).where(Project.id == project_id).returning(Project.name)
+    ).scalar_one_or_none()
+    if project_name is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    bump_versions(db, "projects", "quests")
+    db.commit()
+
+    # Completions have no FK to quests, clean them up after the response
+    if quest_ids:
+        background_tasks.add_task(purge_orphan_completions, quest_ids)
 
     return {"message": f"Project {project_name} was successfully deleted"}
 
 @router.get("/", response_model=List[ProjectListItem])
-def get_all_projects(db: Session = Depends(get_db)):
+def get_all_projects(request: Request, response: Response, db: Session = Depends(get_read_db)):
+    not_modified = conditional_get(request, response, db, "projects")
+    if not_modified:
+        return not_modified
+
     projects = db.query(Project).all()
-    return projects
+    return json_response(ProjectListAdapter, projects, response)
 
 
 @router.get("/{project_id}", response_model=ProjectOut)
-def get_project_by_id(project_id: int, db: Session = Depends(get_db)):
+def get_project_by_id(project_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    not_modified = conditional_get(request, response, db, "projects", cache_control=DETAIL_CACHE)
+    if not_modified:
+        return not_modified
+
     project = db.query(Project).get(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -143,8 +205,8 @@ def get_project_by_id(project_id: int, db: Session = Depends(get_db)):
 @router.get("/xp-by-project/{project_id}")
 def xp_by_project(
     project_id: int,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_user_read)
 ):
     # Get total project XP from all quests
     total_project_xp = db.query(func.coalesce(func.sum(Quest.project_points), 0)).filter(
@@ -165,11 +227,12 @@ def xp_by_project(
 
 
 @router.get("/projects/{project_id}/leaderboard")
-def get_project_leaderboard(project_id: int, db: Session = Depends(get_db)):
+def get_project_leaderboard(project_id: int, db: Session = Depends(get_read_db)):
     results = (
         db.query(
             User.twitter_username,
             User.nft_image_url,
+            User.nft_image_variants,
             UserProjectXP.xp
         )
         .join(UserProjectXP, User.id == UserProjectXP.user_id)
@@ -185,6 +248,7 @@ def get_project_leaderboard(project_id: int, db: Session = Depends(get_db)):
         {
             "twitter_username": mask_username(r.twitter_username),
             "nft_image_url": r.nft_image_url,
+            "nft_image_variants": r.nft_image_variants,
             "project_xp": r.xp
         }
         for r in results
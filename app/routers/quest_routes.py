@@ -2,21 +2,27 @@
 
 import random
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Security, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Security, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
-from jose import JWTError
-from jose import jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
-from app.auth.token import ALGORITHM, SECRET_KEY, get_current_user
+from app.auth.token import ALGORITHM, SECRET_KEY, get_current_user, get_current_user_read
+from app.core.http_cache import DETAIL_CACHE, PRIVATE_CACHE, conditional_get
+from app.core.replica import get_read_db
+from app.core.serialization import json_response
 from app.database import get_db
 from app.models.quests import Quest, QuestAction
 from app.models.project import Project
 from app.models.user import User
-from app.models.user_completed_quest import QuestTypeEnum, UserCompletedQuest
-from app.models.user_project_xp import UserProjectXP
-from app.schemas.quest_schema import QuestActionOut, QuestCreate, QuestOut, QuestSummary, RandomQuestOut
+from app.models.user_completed_quest import UserCompletedQuest
+from app.services.quest_import import insert_quests, parse_import, read_import_body, validate_import
+from app.services.xp import collect_project_xp, record_pending_project_completion
+from app.services.xp_buffer import xp_buffer
+from app.schemas.quest_schema import (
+    QuestActionOut, QuestCreate, QuestListAdapter, QuestOut, QuestSummary, QuestSummaryListAdapter, RandomQuestOut
+)
 
 
 
@@ -56,26 +62,67 @@ def create_quest(quest: QuestCreate, db: Session = Depends(get_db), user: User =
     return new_quest
 
 
+@router.post("/bulk", status_code=201)
+async def bulk_create_quests(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Import many quests with their actions in one transaction.
+
+    Accepts a JSON array of QuestCreate objects, or CSV (text/csv) with one
+    action per row: rows sharing a ``ref`` column become one quest.
+    """
+    rows = parse_import(request.headers.get("content-type"), await read_import_body(request), nested_actions=True)
+
+    def _import():
+        quests = validate_import(db, rows, QuestCreate, Project)
+        ids = insert_quests(
+            db, quests, Quest, "quests",
+            action_model=QuestAction,
+            quest_fields=("project_id", "title", "description", "points", "project_points"),
+        )
+        db.commit()
+        return ids
+
+    quest_ids = await run_in_threadpool(_import)
+    return {"message": f"{len(quest_ids)} quests imported", "created": len(quest_ids), "quest_ids": quest_ids}
+
+
 @router.get("/", response_model=List[QuestSummary])
-def get_all_quests(db: Session = Depends(get_db)):
+def get_all_quests(request: Request, response: Response, db: Session = Depends(get_read_db)):
+    not_modified = conditional_get(request, response, db, "quests")
+    if not_modified:
+        return not_modified
+
     quests = db.query(Quest).all()
-    return quests
+    return json_response(QuestSummaryListAdapter, quests, response)
 
 
 @router.get("/by-project/{project_id}", response_model=list[QuestOut])
-def get_quests_by_project(project_id: int, db: Session = Depends(get_db)):
-    quests = db.query(Quest).filter(Quest.project_id == project_id).all()
+def get_quests_by_project(project_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    not_modified = conditional_get(request, response, db, "quests")
+    if not_modified:
+        return not_modified
+
+    quests = (
+        db.query(Quest)
+        .options(selectinload(Quest.actions))
+        .filter(Quest.project_id == project_id)
+        .all()
+    )
 
     if not quests:
         raise HTTPException(status_code=404, detail="No quests found for this project")
 
-    return quests
+    return json_response(QuestListAdapter, quests, response)
 
 
 @router.get("/completed")
 def get_total_completed_quests(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_user_read)
 ):
     total = db.query(UserCompletedQuest).filter_by(user_id=user.id).count()
     return {"total_claimed_quests": total}
@@ -84,29 +131,41 @@ def get_total_completed_quests(
 @router.get("/{quest_id}", response_model=QuestOut)
 def get_quest_by_id(
     quest_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     credentials: Optional[HTTPAuthorizationCredentials] = Security(security)
 ):
-    # 1. Get quest
-    quest = db.query(Quest).filter(Quest.id == quest_id).first()
-    if not quest:
-        raise HTTPException(status_code=404, detail="Quest not found")
-
-    # 2. Convert actions to schema
-    actions_out = [QuestActionOut.from_orm(action) for action in quest.actions]
-
-    # 3. Default
+    # 1. Optional user check (also part of the ETag, the body differs per user)
     completed = False
-
-    # 4. Optional user check
     if credentials:
+        from jose import JWTError, jwt
+
         try:
             payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
             user_id = int(payload.get("sub"))
-            completed = db.query(UserCompletedQuest).filter_by(user_id=user_id, quest_id=quest.id).first() is not None
+            completed = db.query(UserCompletedQuest).filter_by(user_id=user_id, quest_id=quest_id).first() is not None
         except JWTError:
             pass  # Invalid token, ignore
 
+    # 2. Revalidation
+    not_modified = conditional_get(
+        request, response, db, "quests",
+        extra=(completed,),
+        cache_control=PRIVATE_CACHE if credentials else DETAIL_CACHE,
+        vary="Authorization",
+    )
+    if not_modified:
+        return not_modified
+
+    # 3. Get quest
+    quest = db.query(Quest).filter(Quest.id == quest_id).first()
+    if not quest:
+        raise HTTPException(status_code=404, detail="Quest not found")
+
+    # 4. Convert actions to schema
+    actions_out = [QuestActionOut.model_validate(action) for action in quest.actions]
+
     # 5. Return response (no points info)
     return QuestOut(
         id=quest.id,
@@ -121,7 +180,11 @@ def get_quest_by_id(
 
 
 @router.get("/xp-by-quest/{quest_id}")
-def xp_by_quest_id(quest_id: int, db: Session = Depends(get_db)):
+def xp_by_quest_id(quest_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    not_modified = conditional_get(request, response, db, "quests", cache_control=DETAIL_CACHE)
+    if not_modified:
+        return not_modified
+
     quest = db.query(Quest).filter(Quest.id == quest_id).first()
     if not quest:
         raise HTTPException(status_code=404, detail="Quest not found")
@@ -136,51 +199,50 @@ def xp_by_quest_id(quest_id: int, db: Session = Depends(get_db)):
 
 @router.post("/collect-xp")
 def collect_xp(quest_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    # 1. Check if quest exists
-    quest = db.query(Quest).filter(Quest.id == quest_id).first()
-    if not quest:
-        raise HTTPException(status_code=404, detail="Quest not found")
+    if xp_buffer.running:
+        return _collect_xp_write_behind(quest_id, db, user)
 
-    # 2. Prevent duplicate collection
-    already_collected = db.query(UserCompletedQuest).filter_by(user_id=user.id, quest_id=quest_id).first()
-    if already_collected:
+    # Completion insert, project XP upsert and user XP increment in one statement
+    award = collect_project_xp(db, user.id, quest_id)
+    if award is None:
+        raise HTTPException(status_code=404, detail="Quest not found")
+    if not award.awarded:
+        db.rollback()
         raise HTTPException(status_code=409, detail="XP already collected for this quest")
 
-    # 3. Add Glaria XP to user's xp column
-    user.xp += quest.points
+    db.commit()
 
-    # 4. Add Project XP to user_project_xp
-    project_xp = (
-        db.query(UserProjectXP)
-        .filter_by(user_id=user.id, project_id=quest.project_id)
-        .first()
-    )
+    return {
+        "message": "XP successfully collected",
+        "earned": award.points,
+        "project_points": award.project_points,
+        "total_xp": award.total_xp
+    }
 
-    if project_xp:
-        project_xp.xp += quest.project_points
-    else:
-        project_xp = UserProjectXP(
-            user_id=user.id,
-            project_id=quest.project_id,
-            xp=quest.project_points
-        )
-        db.add(project_xp)
 
-    # 5. Mark quest as completed
-    db.add(UserCompletedQuest(user_id=user.id, quest_id=quest.id,quest_type=QuestTypeEnum.project))
+def _collect_xp_write_behind(quest_id: int, db: Session, user: User):
+    # Completion is committed now; XP is applied by the next buffer flush
+    recorded = record_pending_project_completion(db, user.id, quest_id)
+    if recorded is None:
+        raise HTTPException(status_code=404, detail="Quest not found")
+    award, completion_id = recorded
+    if not award.awarded:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="XP already collected for this quest")
+
     db.commit()
-    db.refresh(user)
+    xp_buffer.add(completion_id, user.id, award.points)
 
     return {
         "message": "XP successfully collected",
-        "earned": quest.points,
-        "project_points": quest.project_points,
-        "total_xp": user.xp
+        "earned": award.points,
+        "project_points": award.project_points,
+        "total_xp": (award.total_xp or 0) + xp_buffer.pending_for(user.id)
     }
 
 
 @router.get("/quests/random", response_model=list[RandomQuestOut])
-def get_random_quests(db: Session = Depends(get_db)):
+def get_random_quests(db: Session = Depends(get_read_db)):
     all_quests = db.query(Quest).all()
     random.shuffle(all_quests)
 
@@ -1,19 +1,22 @@
-import os
+import logging
 from typing import Optional
-from click import prompt
 from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from sqlalchemy import func
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import delete, func
 from sqlalchemy.orm import Session
-from app.auth.token import create_access_token, get_current_user
+from app.auth.token import create_access_token, get_current_user, get_current_user_read
+from app.core.replica import get_read_db
+from app.core.serialization import json_response
 from app.database import get_db
 from app.models.user import User
 from app.models.user_project_xp import UserProjectXP
 from app.schemas.user_schema import UserCreate, UserResponse
-import requests
 from sqlalchemy import desc
 
-from app.utils.s3 import upload_image_bytes_to_s3
+from app.core.jobs import JobQueueFull
+from app.services.nft import nft_jobs, submit_nft_job
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["User"])
 
@@ -21,14 +24,17 @@ router = APIRouter(prefix="/api", tags=["User"])
 class LeaderboardUser(BaseModel):
     twitter_username: str
     nft_image_url: Optional[str]
+    nft_image_variants: Optional[dict[str, str]] = None
     total_xp: int
 
     model_config = {"from_attributes": True}
 
 
+LeaderboardAdapter = TypeAdapter(list[LeaderboardUser])
+
 
 @router.get("/leaderboard", response_model=list[LeaderboardUser])
-def get_leaderboard(db: Session = Depends(get_db)):
+def get_leaderboard(db: Session = Depends(get_read_db)):
     def mask_username(username: str) -> str:
         if not username or len(username) < 2:
             return "***"
@@ -38,6 +44,7 @@ def get_leaderboard(db: Session = Depends(get_db)):
         db.query(
             User.twitter_username,
             User.nft_image_url,
+            User.nft_image_variants,
             (User.xp + func.coalesce(func.sum(UserProjectXP.xp), 0)).label("total_xp")
         )
         .outerjoin(UserProjectXP, User.id == UserProjectXP.user_id)
@@ -46,14 +53,15 @@ def get_leaderboard(db: Session = Depends(get_db)):
         .all()
     )
 
-    return [
-        LeaderboardUser(
-            twitter_username=mask_username(user.twitter_username),
-            nft_image_url=user.nft_image_url,
-            total_xp=user.total_xp
-        )
+    return json_response(LeaderboardAdapter, [
+        {
+            "twitter_username": mask_username(user.twitter_username),
+            "nft_image_url": user.nft_image_url,
+            "nft_image_variants": user.nft_image_variants,
+            "total_xp": user.total_xp
+        }
         for user in xp_data
-    ]
+    ])
 
 
 
@@ -90,19 +98,20 @@ def create_profile(user_data: UserCreate, db: Session = Depends(get_db)):
 
 @router.delete("/delete-user/{user_id}")
 def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
-    print(user) 
-    if not user:
+    # Completions and project XP go with the user via ON DELETE CASCADE
+    username = db.execute(
+        delete(User).where(User.id == user_id).returning(User.username)
+    ).scalar_one_or_none()
+    if username is None:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    db.delete(user)
+
     db.commit()
-    return {"message": f"User {user.username} deleted successfully"}
+    return {"message": f"User {username} deleted successfully"}
 
 
 
 @router.get("/me")
-def get_my_user_info(current_user: User = Depends(get_current_user)):
+def get_my_user_info(current_user: User = Depends(get_current_user_read)):
     return {
         "id": current_user.id,
         "username": current_user.username,
@@ -114,36 +123,26 @@ def get_my_user_info(current_user: User = Depends(get_current_user)):
     }
 
 
-DEEPAI_API_KEY = os.getenv("DEEPAI_API_KEY")  # store this in your .env
-
-@router.post("/generate-nft")
-def generate_nft_image(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    print("📤 Sending request to DeepAI...")
-    prompt = f"{user.username}'s Web3 NFT avatar"
-    print("📤 Prompt for DeepAI:", prompt)
-    # 1. Generate image from DeepAI
-    response = requests.post(
-        "https://api.deepai.org/api/text2img",
-        data={'text': prompt},
-        headers={'api-key': DEEPAI_API_KEY}
-    )
-
-    print("📥 DeepAI Response:", response.status_code, response.text)
+@router.post("/generate-nft", status_code=202)
+async def generate_nft_image(user: User = Depends(get_current_user)):
+    # Generation, download and upload run on the NFT job workers; poll the status URL
+    try:
+        job, created = submit_nft_job(user)
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="NFT generation is busy, try again shortly",
+                            headers={"Retry-After": "30"})
 
-    if response.status_code != 200:
-        raise HTTPException(status_code=500, detail="Failed to generate image")
-
-    image_url = response.json().get('output_url')
-    if not image_url:
-        raise HTTPException(status_code=500, detail="No image returned")
-
-    # 2. Download the image
-    image_data = requests.get(image_url).content
-    s3_url = upload_image_bytes_to_s3(image_data, f"nfts/{user.id}.png")
+    return {
+        "message": "NFT generation queued" if created else "NFT generation already in progress",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/generate-nft/{job.id}",
+    }
 
-    # 3. Save to DB
-    user.nft_image_url = s3_url
-    db.commit()
-    db.refresh(user)
 
-    return {"message": "NFT generated and saved", "nft_image_url": s3_url}
\ No newline at end of file
+@router.get("/generate-nft/{job_id}")
+def get_nft_job(job_id: str, user: User = Depends(get_current_user_read)):
+    job = nft_jobs.get(job_id)
+    if job is None or job.owner != user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
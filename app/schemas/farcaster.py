@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -18,17 +18,16 @@ class FarcasterProjectSchema(BaseModel):
     image_url: Optional[str]
     created_at: Optional[str]  # You can switch to datetime if needed
 
-    class Config:
-        orm_mode = True
+    model_config = {"from_attributes": True}
 
 
 class ProjectListItem(BaseModel):
     id: int
     name: str
     image_url: Optional[str]
+    image_variants: Optional[dict[str, str]] = None  # {"thumb": url, "card": url} once processed
 
-    class Config:
-        orm_mode = True
+    model_config = {"from_attributes": True}
 
 
 class ProjectOut(BaseModel):
@@ -36,10 +35,10 @@ class ProjectOut(BaseModel):
     name: str
     description: Optional[str]
     image_url: Optional[str]
+    image_variants: Optional[dict[str, str]] = None
     created_at: Optional[datetime]
 
-    class Config:
-        orm_mode = True
+    model_config = {"from_attributes": True}
 
 
 # === Quest Schemas ===
@@ -54,8 +53,7 @@ class FarcasterQuestSchema(BaseModel):
     points: int
     created_at: Optional[datetime]
 
-    class Config:
-        orm_mode = True
+    model_config = {"from_attributes": True}
 
 
 class FarcasterQuestOut(BaseModel):
@@ -69,8 +67,7 @@ class FarcasterQuestOut(BaseModel):
     project_id: int
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = {"from_attributes": True}
 
 
 
@@ -82,6 +79,11 @@ class QuestTypeEnum(str, Enum):
 
 
 
+# Pre-built adapters for the fast list serialization path
+ProjectListAdapter = TypeAdapter(List[ProjectListItem])
+FarcasterQuestListAdapter = TypeAdapter(List[FarcasterQuestOut])
+
+
 class QuestClaimRequest(BaseModel):
     quest_id: int
 
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -21,5 +21,7 @@ class GlariaQuestOut(BaseModel):
     points: int
     completed: Optional[bool] = None
 
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+
+GlariaQuestListAdapter = TypeAdapter(List[GlariaQuestOut])
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 from enum import Enum
 
@@ -41,6 +41,7 @@ class ProjectOut(ProjectCreate):
     twitter_username: str
     description: Optional[str]
     image_url: Optional[str] = None
+    image_variants: Optional[dict[str, str]] = None
     project_type: ProjectTypeEnum
     discord_url: Optional[str] = None
     telegram_url: Optional[str] = None
@@ -59,8 +60,28 @@ class ProjectListItem(BaseModel):
     twitter_username: str
     description: Optional[str]
     image_url: Optional[str] = None
+    image_variants: Optional[dict[str, str]] = None  # {"thumb": url, "card": url} once processed
     project_type: ProjectTypeEnum
 
 
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+
+ProjectListAdapter = TypeAdapter(List[ProjectListItem])
+
+
+class ImageUploadRequest(BaseModel):
+    content_type: str = Field(..., description="MIME type of the image, e.g. image/png")
+
+
+class ImageUploadTicket(BaseModel):
+    upload_url: str
+    fields: dict[str, str] = Field(..., description="Form fields to POST before the file")
+    key: str
+    max_bytes: int
+    expires_in: int
+
+
+class ImageFinalizeRequest(BaseModel):
+    key: str = Field(..., description="Key returned by the image-upload endpoint")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import List, Optional
 from datetime import datetime
 
@@ -16,10 +16,7 @@ class QuestActionOut(BaseModel):
     button_type: str
     target_url: Optional[str]
 
-    class Config:
-        orm_mode = True
-    class Config:
-        from_attributes = True
+    model_config = {"from_attributes": True}
 
 
 # QUEST CREATE + RESPONSE SCHEMA
@@ -42,8 +39,7 @@ class QuestOut(BaseModel):
     completed: bool = False  # 👈 Add this line
 
 
-    class Config:
-        orm_mode = True
+    model_config = {"from_attributes": True}
 
 
 # OPTIONAL: QUEST LISTING WITHOUT ACTIONS
@@ -55,8 +51,7 @@ class QuestSummary(BaseModel):
     points: int
     project_points: int
 
-    class Config:
-        orm_mode = True
+    model_config = {"from_attributes": True}
 
 
 class RandomQuestOut(BaseModel):
@@ -65,4 +60,9 @@ class RandomQuestOut(BaseModel):
     title: str
     description: str
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+
+# Pre-built adapters for the fast list serialization path
+QuestListAdapter = TypeAdapter(List[QuestOut])
+QuestSummaryListAdapter = TypeAdapter(List[QuestSummary])
@@ -7,5 +7,4 @@ class TwitterTokenOut(BaseModel):
     refresh_token: str | None = None
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = {"from_attributes": True}
\ No newline at end of file
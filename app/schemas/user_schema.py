@@ -20,5 +20,4 @@ class UserResponse(BaseModel):
     wallet_address: Optional[str] = None
     xp: int
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = {"from_attributes": True}
\ No newline at end of file
@@ -0,0 +1,60 @@
+# app/services/cleanup.py
+from itertools import islice
+from typing import Iterable
+
+from sqlalchemy import delete, exists, select
+
+from app.database import SessionLocal
+from app.models.glaria_quest import GlariaQuest
+from app.models.quests import Quest
+from app.models.user_completed_quest import QuestTypeEnum, UserCompletedQuest
+
+COMPLETION_PURGE_BATCH = 5000
+QUEST_ID_CHUNK = 1000
+
+QUEST_MODELS = {
+    QuestTypeEnum.project: Quest,
+    QuestTypeEnum.glaria: GlariaQuest,
+}
+
+
+def purge_orphan_completions(quest_ids: Iterable[int], quest_type: QuestTypeEnum = QuestTypeEnum.project,
+                             batch_size: int = COMPLETION_PURGE_BATCH) -> int:
+    """
+    Delete completion rows that point at deleted quests.
+
+    ``user_completed_quests.quest_id`` has no foreign key (it refers to either
+    table depending on ``quest_type``), so the database cannot cascade it.
+    Runs as a background task after the delete has committed, in short
+    batches so no single transaction holds locks on many rows. Rows whose
+    quest still exists are never touched.
+    """
+    quest_model = QUEST_MODELS[quest_type]
+    quest_ids = iter(quest_ids)
+    total = 0
+
+    db = SessionLocal()
+    try:
+        while chunk := list(islice(quest_ids, QUEST_ID_CHUNK)):
+            while True:
+                batch = (
+                    select(UserCompletedQuest.id)
+                    .where(
+                        UserCompletedQuest.quest_type == quest_type,
+                        UserCompletedQuest.quest_id.in_(chunk),
+                        ~exists().where(quest_model.id == UserCompletedQuest.quest_id),
+                    )
+                    .limit(batch_size)
+                )
+                deleted = db.execute(
+                    delete(UserCompletedQuest)
+                    .where(UserCompletedQuest.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                db.commit()
+                total += deleted
+                if deleted < batch_size:
+                    break
+    finally:
+        db.close()
+    return total
@@ -1,6 +1,9 @@
-import requests
+import logging
 from typing import Optional
 from app.core.config import settings
+from app.core.metrics import observe_dependency
+
+logger = logging.getLogger(__name__)
 
 NEYNAR_API_KEY = settings.NEYNAR_API_KEY
 
@@ -11,6 +14,22 @@ NEYNAR_HEADERS = {
 }
 
 
+def _neynar_get(url: str, params: Optional[dict] = None):
+    import requests  # lazy: only quest verification talks to Neynar
+    operation = url.split("?", 1)[0].rsplit("/", 1)[-1]  # "cast", "cast-replies", ...
+    with observe_dependency("neynar", operation):
+        return requests.get(url, headers=NEYNAR_HEADERS, params=params)
+
+
+def _log_response(caller: str, response) -> None:
+    # Bodies only at DEBUG, and truncated by the log pipeline; failures are always logged
+    if response.status_code != 200:
+        logger.warning("%s: Neynar returned %s for %s: %s", caller, response.status_code,
+                       response.url, response.text)
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s: %s -> %s", caller, response.url, response.text)
+
+
 def extract_cast_hash(url: str) -> str:
     return url.rstrip("/").split("/")[-1]
 
@@ -28,12 +47,9 @@ def get_cast_metadata_from_url(target_url: str, viewer_fid: Optional[int] = None
     if viewer_fid:
         params["viewer_fid"] = viewer_fid
 
-    response = requests.get(url, headers=NEYNAR_HEADERS, params=params)
+    response = _neynar_get(url, params)
 
-    print(f"[get_cast_metadata_from_url] Request URL: {url}")
-    print(f"[get_cast_metadata_from_url] Params: {params}")
-    print(f"[get_cast_metadata_from_url] Status Code: {response.status_code}")
-    print(f"[get_cast_metadata_from_url] Response: {response.text}")
+    _log_response("get_cast_metadata_from_url", response)
 
     if response.status_code == 200:
         cast = response.json().get("cast", {})
@@ -50,31 +66,29 @@ def get_cast_metadata_from_url(target_url: str, viewer_fid: Optional[int] = None
 def has_liked_cast(fid: int, target_url: str) -> bool:
     meta = get_cast_metadata_from_url(target_url, viewer_fid=fid)
     if not meta:
-        print("[has_liked_cast] Failed to get cast metadata.")
+        logger.info("has_liked_cast: no cast metadata for fid=%s url=%s", fid, target_url)
         return False
 
-    print(f"[has_liked_cast] Meta: {meta}")
+    logger.debug("has_liked_cast: fid=%s meta=%s", fid, meta)
     return meta.get("liked", False)
 
 
 def has_recasted_cast(fid: int, target_url: str) -> bool:
     meta = get_cast_metadata_from_url(target_url, viewer_fid=fid)
     if not meta:
-        print("[has_recasted_cast] Failed to get cast metadata.")
+        logger.info("has_recasted_cast: no cast metadata for fid=%s url=%s", fid, target_url)
         return False
 
-    print(f"[has_recasted_cast] Meta: {meta}")
+    logger.debug("has_recasted_cast: fid=%s meta=%s", fid, meta)
     return meta.get("recasted", False)
 
 
 def has_replied_to_cast(fid: int, target_url: str) -> bool:
     cast_hash = extract_cast_hash(target_url)
     url = f"https://api.neynar.com/v2/farcaster/cast-replies?cast_hash={cast_hash}"
-    response = requests.get(url, headers=NEYNAR_HEADERS)
+    response = _neynar_get(url)
 
-    print(f"[has_replied_to_cast] URL: {url}")
-    print(f"[has_replied_to_cast] Status Code: {response.status_code}")
-    print(f"[has_replied_to_cast] Response: {response.text}")
+    _log_response("has_replied_to_cast", response)
 
     if response.status_code == 200:
         replies = response.json().get("replies", [])
@@ -86,11 +100,9 @@ def has_replied_to_cast(fid: int, target_url: str) -> bool:
 def has_followed_user(fid: int, target_url: str) -> bool:
     target_username = extract_username_from_url(target_url)
     url = f"https://api.neynar.com/v2/farcaster/user-following?fid={fid}"
-    response = requests.get(url, headers=NEYNAR_HEADERS)
+    response = _neynar_get(url)
 
-    print(f"[has_followed_user] URL: {url}")
-    print(f"[has_followed_user] Status Code: {response.status_code}")
-    print(f"[has_followed_user] Response: {response.text}")
+    _log_response("has_followed_user", response)
 
     if response.status_code == 200:
         following = response.json().get("users", [])
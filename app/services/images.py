@@ -0,0 +1,146 @@
+# app/services/images.py
+"""
+Resized variants of the images we host (project logos, NFT avatars).
+
+Whenever an image URL is stored, ``queue_image_variants`` hands the row to
+``image_jobs``. The job reads the original back from S3, decodes and
+validates it with Pillow (size and pixel caps, EXIF orientation), renders
+each entry of ``VARIANT_SIZES`` as WebP (or AVIF) next to the original
+(``<sha256>.png`` -> ``<sha256>.thumb-128.webp``) and stores their URLs in
+the row's variants column. Originals are content-addressed, so variants that
+already exist are reused rather than rendered again, and they are cached as
+immutable like the originals. List endpoints can then serve the thumbnail and fall back
+to the original while it is NULL.
+
+The update only applies if the row still points at the same original, so
+a slow job cannot attach stale variants to a newer upload.
+"""
+import io
+import logging
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.http_cache import VERSIONED_TABLES, bump_versions
+from app.core.jobs import Job, JobError, JobQueue, JobQueueFull
+from app.database import SessionLocal
+from app.models.farcaster import FarcasterProject
+from app.models.project import Project
+from app.models.user import User
+from app.utils.s3 import (IMMUTABLE_CACHE_CONTROL, S3_BUCKET_NAME, get_s3_client, key_from_url,
+                          object_exists, object_url, observe_s3)
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels; images are only ever scaled down
+VARIANT_SIZES = {"thumb": 128, "card": 512}
+
+# table -> (model, original URL column, variants column)
+TARGETS = {
+    "projects": (Project, "image_url", "image_variants"),
+    "farcaster_projects": (FarcasterProject, "image_url", "image_variants"),
+    "users": (User, "nft_image_url", "nft_image_variants"),
+}
+
+image_jobs = JobQueue("images", workers=settings.IMAGE_JOB_WORKERS, maxsize=settings.IMAGE_JOB_QUEUE_SIZE)
+
+
+def render_variants(data: bytes, sizes: dict[str, int] = VARIANT_SIZES,
+                    fmt: Optional[str] = None) -> dict[str, bytes]:
+    """Decode ``data`` and encode one downscaled copy per size; JobError if it is not a usable image."""
+    from PIL import Image, ImageOps, UnidentifiedImageError  # lazy: only the image worker needs Pillow
+
+    fmt = (fmt or settings.IMAGE_VARIANT_FORMAT).upper()
+    try:
+        with Image.open(io.BytesIO(data)) as probe:
+            width, height = probe.size
+            if width * height > settings.IMAGE_MAX_PIXELS:
+                raise JobError(f"Image is too large ({width}x{height})")
+            probe.verify()
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise JobError(f"Not a decodable image: {e}")
+
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+    variants = {}
+    for name, edge in sizes.items():
+        copy = image.copy()
+        copy.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        copy.save(out, fmt, quality=settings.IMAGE_VARIANT_QUALITY)
+        variants[name] = out.getvalue()
+    return variants
+
+
+def _build_variants(key: str) -> dict[str, str]:
+    extension = settings.IMAGE_VARIANT_FORMAT.lower()
+    base = key.rsplit(".", 1)[0]
+    keys = {name: f"{base}.{name}-{edge}.{extension}" for name, edge in VARIANT_SIZES.items()}
+    if all(object_exists(variant_key) for variant_key in keys.values()):
+        return {name: object_url(variant_key) for name, variant_key in keys.items()}
+
+    client = get_s3_client()
+    with observe_s3("get_object"):
+        body = client.get_object(Bucket=S3_BUCKET_NAME, Key=key)["Body"]
+        data = body.read(settings.IMAGE_MAX_SOURCE_BYTES + 1)
+        body.close()
+    if len(data) > settings.IMAGE_MAX_SOURCE_BYTES:
+        raise JobError("Image is too large to process")
+
+    urls = {}
+    for name, blob in render_variants(data).items():
+        with observe_s3("upload"):
+            client.put_object(Bucket=S3_BUCKET_NAME, Key=keys[name], Body=blob,
+                              ContentType=f"image/{extension}", CacheControl=IMMUTABLE_CACHE_CONTROL)
+        urls[name] = object_url(keys[name])
+    return urls
+
+
+def _save_variants(table: str, row_id: int, original_url: str, variants: dict) -> bool:
+    model, url_column, variants_column = TARGETS[table]
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(model)
+            .where(model.id == row_id, getattr(model, url_column) == original_url)
+            .values({variants_column: variants})
+        )
+        # Core UPDATEs skip the before_flush hook; bump the ETag versions here
+        if result.rowcount:
+            bump_versions(db, *VERSIONED_TABLES.get(table, ()))
+        db.commit()
+        return result.rowcount > 0
+    finally:
+        db.close()
+
+
+async def process_image(job: Job, table: str, row_id: int, original_url: str) -> dict:
+    key = key_from_url(original_url)
+    job.stage = "rendering"
+    variants = await run_in_threadpool(_build_variants, key)
+    job.stage = "saving"
+    if not await run_in_threadpool(_save_variants, table, row_id, original_url, variants):
+        logger.info("%s %s changed image while processing; variants discarded", table, row_id)
+    job.stage = None
+    return variants
+
+
+def queue_image_variants(table: str, row_id: int, original_url: Optional[str], from_thread: bool = True) -> None:
+    """Schedule variants for a freshly stored image URL (call after the commit)."""
+    if not settings.IMAGE_VARIANTS_ENABLED or key_from_url(original_url) is None:
+        return
+
+    async def run(job: Job) -> dict:
+        return await process_image(job, table, row_id, original_url)
+
+    submit = image_jobs.submit_threadsafe if from_thread else image_jobs.submit
+    try:
+        submit(run, key=f"{table}:{row_id}:{original_url}")
+    except (JobQueueFull, RuntimeError, TimeoutError) as e:
+        # The original stays usable; the variants column just stays NULL
+        logger.warning("Image variants for %s %s not queued: %r", table, row_id, e)
@@ -0,0 +1,93 @@
+# app/services/nft.py
+"""
+NFT avatar generation as a background job.
+
+``POST /api/generate-nft`` submits ``generate_nft`` to ``nft_jobs`` and
+returns the job id; the job asks DeepAI for an image, stores it in S3 under
+its content hash and saves the URL on ``User.nft_image_url``. One active
+job per user: repeated requests while it runs get the same job back.
+"""
+import logging
+import os
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.jobs import Job, JobError, JobQueue
+from app.core.metrics import observe_dependency
+from app.database import SessionLocal
+from app.models.user import User
+from app.services.images import queue_image_variants
+from app.utils.s3 import IMAGE_CONTENT_TYPES, UploadTooLarge, upload_async_stream_to_s3
+
+logger = logging.getLogger(__name__)
+
+DEEPAI_API_KEY = os.getenv("DEEPAI_API_KEY")  # store this in your .env
+DEEPAI_TEXT2IMG_URL = "https://api.deepai.org/api/text2img"
+
+nft_jobs = JobQueue("nft", workers=settings.NFT_JOB_WORKERS, maxsize=settings.NFT_JOB_QUEUE_SIZE)
+
+
+def _save_nft_url(user_id: int, url: str) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(update(User).where(User.id == user_id).values(nft_image_url=url, nft_image_variants=None))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def generate_nft(job: Job, user_id: int, username: str) -> dict:
+    prompt = f"{username}'s Web3 NFT avatar"
+    timeout = httpx.Timeout(settings.DEEPAI_TIMEOUT_SECONDS, connect=10.0)
+    try:
+        async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
+            # 1. Generate image from DeepAI
+            job.stage = "generating"
+            logger.info("Requesting DeepAI image for user %s (job %s)", user_id, job.id)
+            with observe_dependency("deepai", "text2img"):
+                response = await client.post(DEEPAI_TEXT2IMG_URL, data={"text": prompt},
+                                             headers={"api-key": DEEPAI_API_KEY or ""})
+            if response.status_code != 200:
+                logger.warning("DeepAI returned %s for user %s: %s", response.status_code, user_id, response.text)
+                raise JobError("Failed to generate image")
+
+            image_url = response.json().get("output_url")
+            if not image_url:
+                raise JobError("No image returned")
+
+            # 2. Stream the image from DeepAI into S3, one part in memory at a time
+            job.stage = "uploading"
+            with observe_dependency("deepai", "download"):
+                async with client.stream("GET", image_url) as download:
+                    download.raise_for_status()
+                    content_type = download.headers.get("content-type", "").split(";")[0].strip()
+                    if content_type not in IMAGE_CONTENT_TYPES:
+                        content_type = "image/png"
+                    s3_url = await upload_async_stream_to_s3(
+                        download.aiter_bytes(), "nfts", IMAGE_CONTENT_TYPES[content_type], content_type,
+                        max_bytes=settings.NFT_MAX_IMAGE_BYTES,
+                    )
+    except httpx.HTTPError as e:
+        logger.warning("DeepAI request failed for user %s: %r", user_id, e)
+        raise JobError("Image service unavailable, try again later")
+    except UploadTooLarge:
+        raise JobError("Generated image is too large")
+
+    # 3. Save to DB
+    job.stage = "saving"
+    await run_in_threadpool(_save_nft_url, user_id, s3_url)
+    queue_image_variants("users", user_id, s3_url, from_thread=False)
+    job.stage = None
+    return {"nft_image_url": s3_url}
+
+
+def submit_nft_job(user: User) -> tuple[Job, bool]:
+    user_id, username = user.id, user.username
+
+    async def run(job: Job) -> dict:
+        return await generate_nft(job, user_id, username)
+
+    return nft_jobs.submit(run, key=f"user:{user_id}", owner=user_id)
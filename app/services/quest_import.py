@@ -0,0 +1,205 @@
+# app/services/quest_import.py
+"""
+Bulk quest import.
+
+Payloads are parsed and validated in full before anything touches the
+database; a single bad row rejects the whole import with per-row errors.
+Valid imports are written in one transaction with batched multi-row
+INSERT ... RETURNING statements, so cost grows linearly with row count
+instead of paying a commit and refresh per quest.
+"""
+import csv
+import io
+import json
+from itertools import islice
+from typing import Iterable, Iterator, Type
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.core.http_cache import bump_versions
+
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_ROWS = 50_000
+# Enough for MAX_IMPORT_ROWS of typical quests; checked before the body is buffered
+MAX_IMPORT_BYTES = 16 * 1024 * 1024
+
+ACTION_COLUMNS = {
+    "action_type": "type",
+    "action_button_type": "button_type",
+    "action_target_url": "target_url",
+}
+
+
+def _batches(items: list, size: int) -> Iterator[list]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def _blank_to_none(row: dict) -> dict:
+    return {k.strip(): (v.strip() or None) if isinstance(v, str) else v for k, v in row.items() if k}
+
+
+def _strip_strings(value):
+    """Trim every string in a parsed row (actions included), as the single-quest create routes do."""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {k: _strip_strings(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_strip_strings(v) for v in value]
+    return value
+
+
+async def read_import_body(request: Request) -> bytes:
+    """The request body, or a 413 as soon as it is known to exceed MAX_IMPORT_BYTES."""
+    too_large = HTTPException(status_code=413, detail=f"Import exceeds {MAX_IMPORT_BYTES} bytes")
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > MAX_IMPORT_BYTES:
+        raise too_large
+
+    # Content-Length may be missing (chunked) or wrong; count what actually arrives
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_IMPORT_BYTES:
+            raise too_large
+    return bytes(body)
+
+
+def _parse_json(body: bytes) -> list[tuple[int, dict]]:
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if isinstance(data, dict):
+        data = data.get("quests")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of quests or {\"quests\": [...]}")
+    return list(enumerate(data, start=1))
+
+
+def _parse_csv(body: bytes, nested_actions: bool) -> list[tuple[int, dict]]:
+    """
+    One quest per row. With ``nested_actions`` each row may also carry one
+    action (action_type, action_button_type, action_target_url); rows sharing
+    the same ``ref`` are merged into one quest with several actions.
+    """
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+
+    quests: list[tuple[int, dict]] = []
+    by_ref: dict[str, dict] = {}
+    # Line 1 is the header, so data rows start at 2
+    for line_no, raw in enumerate(csv.DictReader(io.StringIO(text)), start=2):
+        row = _blank_to_none(raw)
+        if not nested_actions:
+            quests.append((line_no, row))
+            continue
+
+        action = {field: row.pop(col, None) for col, field in ACTION_COLUMNS.items()}
+        ref = row.pop("ref", None)
+        quest = by_ref.get(ref) if ref else None
+        if quest is None:
+            quest = {**row, "actions": []}
+            quests.append((line_no, quest))
+            if ref:
+                by_ref[ref] = quest
+        if any(action.values()):
+            quest["actions"].append(action)
+    return quests
+
+
+def parse_import(content_type: str, body: bytes, nested_actions: bool) -> list[tuple[int, dict]]:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        rows = _parse_csv(body, nested_actions)
+    elif media_type in ("application/json", ""):
+        rows = _parse_json(body)
+    else:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type: {media_type}")
+
+    if not rows:
+        raise HTTPException(status_code=400, detail="No quests to import")
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_IMPORT_ROWS} quests per import")
+    return rows
+
+
+def validate_import(
+    db: Session,
+    rows: list[tuple[int, dict]],
+    schema: Type[BaseModel],
+    project_model,
+    required_text: Iterable[str] = ("title", "description"),
+) -> list[BaseModel]:
+    """Validate every row and every referenced project; raise 422 listing all failures."""
+    adapter = TypeAdapter(schema)
+    errors = []
+    quests = []
+
+    for row_no, raw in rows:
+        try:
+            quest = adapter.validate_python(_strip_strings(raw))
+        except ValidationError as e:
+            errors.append({"row": row_no, "errors": e.errors(include_url=False, include_context=False)})
+            continue
+
+        empty = [f for f in required_text if not getattr(quest, f) or getattr(quest, f).lower() == "string"]
+        if empty:
+            errors.append({"row": row_no, "errors": [f"You cannot leave these fields empty: {', '.join(empty)}"]})
+            continue
+        quests.append((row_no, quest))
+
+    project_ids = {q.project_id for _, q in quests}
+    known = set(db.execute(select(project_model.id).where(project_model.id.in_(project_ids))).scalars())
+    for row_no, quest in quests:
+        if quest.project_id not in known:
+            errors.append({"row": row_no, "errors": [f"Project {quest.project_id} not found"]})
+
+    if errors:
+        errors.sort(key=lambda e: e["row"])
+        raise HTTPException(
+            status_code=422,
+            detail={"message": f"{len(errors)} of {len(rows)} rows are invalid, nothing was imported", "errors": errors},
+        )
+    return [q for _, q in quests]
+
+
+def insert_quests(
+    db: Session,
+    quests: list[BaseModel],
+    quest_model,
+    version_key: str,
+    action_model=None,
+    quest_fields: Iterable[str] = (),
+) -> list[int]:
+    """Insert validated quests (and their actions) in batches, in the caller's transaction."""
+    quest_fields = tuple(quest_fields)
+    quest_ids: list[int] = []
+
+    for batch in _batches(quests, IMPORT_BATCH_SIZE):
+        # Core inserts on the tables: the ORM bulk path falls back to one
+        # statement per row here, while Core batches into multi-row VALUES.
+        ids = db.execute(
+            insert(quest_model.__table__).returning(quest_model.id, sort_by_parameter_order=True),
+            [{f: getattr(q, f) for f in quest_fields} for q in batch],
+        ).scalars().all()
+        quest_ids.extend(ids)
+
+        if action_model is not None:
+            actions = [
+                {"quest_id": quest_id, **action.model_dump()}
+                for quest_id, quest in zip(ids, batch)
+                for action in quest.actions
+            ]
+            for action_batch in _batches(actions, IMPORT_BATCH_SIZE):
+                db.execute(insert(action_model.__table__), action_batch)
+
+    bump_versions(db, version_key)
+    return quest_ids
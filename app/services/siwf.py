@@ -2,30 +2,46 @@
 from __future__ import annotations
 
 import re
-from typing import Any
-
-from siwe import SiweMessage, DomainMismatch, NonceMismatch, ExpiredMessage
-from web3 import Web3
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
 from app.core.config import settings
+from app.core.metrics import observe_dependency
+from app.core.tracing import start_span
+
+if TYPE_CHECKING:
+    from siwe import SiweMessage
+
+# siwe (compiles its ABNF grammars on import) and web3 are the heaviest imports
+# in the app; they are loaded on the first SIWF verification or by app.core.prewarm
 
 EXPECTED_CHAIN_ID = 10  # Farcaster ID Registry on Optimism
 
-w3 = Web3(Web3.HTTPProvider(settings.OPTIMISM_RPC_URL, request_kwargs={"timeout": 15}))
-ID_REGISTRY = w3.eth.contract(
-    address=Web3.to_checksum_address(settings.ID_REGISTRY_ADDRESS),
-    abi=[
-        {
-            "inputs": [{"internalType": "uint256", "name": "fid", "type": "uint256"}],
-            "name": "custodyOf",
-            "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-            "stateMutability": "view",
-            "type": "function",
-        }
-    ],
-)
+ID_REGISTRY_ABI = [
+    {
+        "inputs": [{"internalType": "uint256", "name": "fid", "type": "uint256"}],
+        "name": "custodyOf",
+        "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function",
+    }
+]
+
+
+@lru_cache(maxsize=1)
+def get_id_registry():
+    """Web3 provider + ID Registry contract, built on first SIWF verification."""
+    from web3 import Web3
+
+    w3 = Web3(Web3.HTTPProvider(settings.OPTIMISM_RPC_URL, request_kwargs={"timeout": 15}))
+    return w3.eth.contract(
+        address=Web3.to_checksum_address(settings.ID_REGISTRY_ADDRESS),
+        abi=ID_REGISTRY_ABI,
+    )
 
 def _load_siwe_model(raw: str) -> SiweMessage:
+    from siwe import SiweMessage
+
     # 1) keyword constructor
     try:
         return SiweMessage(message=raw)
@@ -71,8 +87,12 @@ def verify_message_and_get(
     signature: str,
     expected_nonce: str | None,
 ):
+    from siwe import DomainMismatch, ExpiredMessage, NonceMismatch
+    from web3 import Web3
+
     # 1) Parse
-    siwe = _load_siwe_model(message)
+    with start_span("siwe.parse"):
+        siwe = _load_siwe_model(message)
 
     # 2) Domain allow-list (exact match to one allowed authority)
     dom = getattr(siwe, "domain", None)
@@ -94,7 +114,8 @@ def verify_message_and_get(
 
     # 5) Signature verification
     try:
-        siwe.verify(signature, domain=siwe.domain, nonce=siwe.nonce)
+        with start_span("siwe.verify"):
+            siwe.verify(signature, domain=siwe.domain, nonce=siwe.nonce)
     except (DomainMismatch, NonceMismatch, ExpiredMessage) as e:
         raise ValueError(f"Signature verify failed: {e.__class__.__name__}")
 
@@ -108,7 +129,8 @@ def verify_message_and_get(
         raise ValueError("FID mismatch")
 
     # 7) Check current custody on-chain
-    custody = ID_REGISTRY.functions.custodyOf(fid).call()
+    with observe_dependency("optimism_rpc", "custodyOf"):
+        custody = get_id_registry().functions.custodyOf(fid).call()
     custody = None if int(custody, 16) == 0 else Web3.to_checksum_address(custody)
     if custody is None or custody != signer:
         raise ValueError("Signer is not current custody for FID")
@@ -0,0 +1,134 @@
+# app/services/xp.py
+"""
+Atomic XP collection.
+
+Each claim is one statement: a data-modifying CTE inserts the completion
+with ``ON CONFLICT DO NOTHING`` and only when that insert actually produced
+a row does it upsert the project XP and increment the user's XP. Concurrent
+claims for the same (user, quest) serialize on the unique constraint, so a
+double-click can never award twice.
+"""
+from typing import NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.user_completed_quest import UserCompletedQuest
+
+_QUEST_TYPE = UserCompletedQuest.__table__.c.quest_type.type.name  # postgres enum type name
+
+COLLECT_PROJECT_XP = text(f"""
+WITH quest AS (
+    SELECT id, project_id,
+           COALESCE(points, 0) AS points,
+           COALESCE(project_points, 0) AS project_points
+    FROM quests
+    WHERE id = :quest_id
+),
+completion AS (
+    INSERT INTO user_completed_quests (user_id, quest_id, quest_type)
+    SELECT :user_id, quest.id, 'project'::{_QUEST_TYPE} FROM quest
+    ON CONFLICT ON CONSTRAINT _user_quest_uc DO NOTHING
+    RETURNING quest_id
+),
+project_xp AS (
+    INSERT INTO user_project_xp (user_id, project_id, xp)
+    SELECT :user_id, quest.project_id, quest.project_points
+    FROM quest JOIN completion ON completion.quest_id = quest.id
+    ON CONFLICT ON CONSTRAINT user_project_unique
+    DO UPDATE SET xp = COALESCE(user_project_xp.xp, 0) + EXCLUDED.xp
+),
+user_xp AS (
+    UPDATE users SET xp = COALESCE(users.xp, 0) + quest.points
+    FROM quest JOIN completion ON completion.quest_id = quest.id
+    WHERE users.id = :user_id
+    RETURNING users.xp
+)
+SELECT quest.points,
+       quest.project_points,
+       EXISTS (SELECT 1 FROM completion) AS awarded,
+       (SELECT xp FROM user_xp) AS total_xp
+FROM quest
+""")
+
+COLLECT_GLARIA_XP = text(f"""
+WITH quest AS (
+    SELECT id, COALESCE(points, 0) AS points
+    FROM glaria_quests
+    WHERE id = :quest_id
+),
+completion AS (
+    INSERT INTO user_completed_quests (user_id, quest_id, quest_type)
+    SELECT :user_id, quest.id, 'glaria'::{_QUEST_TYPE} FROM quest
+    ON CONFLICT ON CONSTRAINT _user_quest_uc DO NOTHING
+    RETURNING quest_id
+),
+user_xp AS (
+    UPDATE users SET xp = COALESCE(users.xp, 0) + quest.points
+    FROM quest JOIN completion ON completion.quest_id = quest.id
+    WHERE users.id = :user_id
+    RETURNING users.xp
+)
+SELECT quest.points,
+       0 AS project_points,
+       EXISTS (SELECT 1 FROM completion) AS awarded,
+       (SELECT xp FROM user_xp) AS total_xp
+FROM quest
+""")
+
+
+# Write-behind variant: only the completion is written now, flagged xp_pending;
+# app.services.xp_buffer applies the XP later in batches.
+RECORD_PENDING_PROJECT_COMPLETION = text(f"""
+WITH quest AS (
+    SELECT id,
+           COALESCE(points, 0) AS points,
+           COALESCE(project_points, 0) AS project_points
+    FROM quests
+    WHERE id = :quest_id
+),
+completion AS (
+    INSERT INTO user_completed_quests (user_id, quest_id, quest_type, xp_pending)
+    SELECT :user_id, quest.id, 'project'::{_QUEST_TYPE}, true FROM quest
+    ON CONFLICT ON CONSTRAINT _user_quest_uc DO NOTHING
+    RETURNING id
+)
+SELECT quest.points,
+       quest.project_points,
+       (SELECT id FROM completion) AS completion_id,
+       (SELECT xp FROM users WHERE id = :user_id) AS total_xp
+FROM quest
+""")
+
+
+class XPAward(NamedTuple):
+    points: int
+    project_points: int
+    awarded: bool             # False when the quest was already collected
+    total_xp: Optional[int]   # user's XP after the award (None when not awarded)
+
+
+def collect_project_xp(db: Session, user_id: int, quest_id: int) -> Optional[XPAward]:
+    """Claim a project quest in one round trip. Returns None if the quest does not exist."""
+    row = db.execute(COLLECT_PROJECT_XP, {"user_id": user_id, "quest_id": quest_id}).first()
+    return XPAward(*row) if row else None
+
+
+def collect_glaria_xp(db: Session, user_id: int, quest_id: int) -> Optional[XPAward]:
+    """Claim a Glaria quest in one round trip. Returns None if the quest does not exist."""
+    row = db.execute(COLLECT_GLARIA_XP, {"user_id": user_id, "quest_id": quest_id}).first()
+    return XPAward(*row) if row else None
+
+
+def record_pending_project_completion(db: Session, user_id: int, quest_id: int):
+    """
+    Insert the completion only (write-behind mode). Returns None if the quest
+    does not exist, otherwise (award, completion_id); completion_id is None
+    when the quest was already collected. ``award.total_xp`` is the user's
+    XP as stored, without increments still waiting in the buffer.
+    """
+    row = db.execute(RECORD_PENDING_PROJECT_COMPLETION, {"user_id": user_id, "quest_id": quest_id}).first()
+    if row is None:
+        return None
+    points, project_points, completion_id, total_xp = row
+    return XPAward(points, project_points, completion_id is not None, total_xp), completion_id
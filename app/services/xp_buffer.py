@@ -0,0 +1,176 @@
+# app/services/xp_buffer.py
+"""
+Write-behind XP aggregation for hot projects.
+
+In write-behind mode a claim only inserts its completion row, flagged
+``xp_pending``. The buffer collects those completion ids and a background
+thread flushes them every ``XP_FLUSH_INTERVAL_MS``: one statement claims
+the pending rows (``UPDATE ... SET xp_pending = false ... RETURNING``),
+merges their points per user and per (user, project), and applies them
+with batched upserts. Thousands of claims against one project become a
+handful of row updates per interval instead of one lock per claim.
+
+Because increments are derived from the rows each flush claims, a row is
+applied exactly once no matter who claims it. Completions left pending by
+a crashed worker are picked up by the periodic recovery pass once they are
+older than ``XP_RECOVERY_GRACE_SECONDS``.
+"""
+import logging
+import threading
+from collections import defaultdict
+from itertools import islice
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 5000
+RECOVERY_INTERVAL_SECONDS = 30
+
+_APPLY_PENDING_XP = """
+WITH claimed AS (
+    UPDATE user_completed_quests SET xp_pending = false
+    WHERE {claim_filter}
+    RETURNING user_id, quest_id
+),
+gains AS (
+    SELECT claimed.user_id, quests.project_id,
+           SUM(COALESCE(quests.points, 0)) AS points,
+           SUM(COALESCE(quests.project_points, 0)) AS project_points
+    FROM claimed JOIN quests ON quests.id = claimed.quest_id
+    GROUP BY claimed.user_id, quests.project_id
+),
+project_xp AS (
+    INSERT INTO user_project_xp (user_id, project_id, xp)
+    SELECT user_id, project_id, project_points FROM gains
+    ON CONFLICT ON CONSTRAINT user_project_unique
+    DO UPDATE SET xp = COALESCE(user_project_xp.xp, 0) + EXCLUDED.xp
+),
+user_xp AS (
+    UPDATE users SET xp = COALESCE(users.xp, 0) + user_gains.points
+    FROM (SELECT user_id, SUM(points) AS points FROM gains GROUP BY user_id) AS user_gains
+    WHERE users.id = user_gains.user_id
+)
+SELECT count(*) FROM claimed
+"""
+
+# Rows this worker buffered
+FLUSH_PENDING_XP = text(_APPLY_PENDING_XP.format(
+    claim_filter="id = ANY(:ids) AND xp_pending",
+))
+
+# Rows some worker buffered but never flushed; SKIP LOCKED leaves rows that a
+# live flush is claiming right now alone
+RECOVER_PENDING_XP = text(_APPLY_PENDING_XP.format(
+    claim_filter="""id IN (
+        SELECT id FROM user_completed_quests
+        WHERE xp_pending AND collected_at < now() - make_interval(secs => :grace)
+        ORDER BY id
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )""",
+))
+
+
+class XPBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending_ids: list[int] = []
+        self._user_deltas: dict[int, int] = defaultdict(int)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.interval = 0.25
+        self.recovery_grace = 60
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def add(self, completion_id: int, user_id: int, points: int) -> None:
+        with self._lock:
+            self._pending_ids.append(completion_id)
+            self._user_deltas[user_id] += points
+
+    def pending_for(self, user_id: int) -> int:
+        """XP buffered for this user in this worker and not flushed yet."""
+        with self._lock:
+            return self._user_deltas.get(user_id, 0)
+
+    def flush(self) -> int:
+        with self._lock:
+            ids, self._pending_ids = self._pending_ids, []
+            deltas, self._user_deltas = self._user_deltas, defaultdict(int)
+        if not ids:
+            return 0
+
+        db = SessionLocal()
+        try:
+            it = iter(ids)
+            while chunk := list(islice(it, FLUSH_BATCH_SIZE)):
+                db.execute(FLUSH_PENDING_XP, {"ids": chunk})
+            db.commit()
+            return len(ids)
+        except Exception:
+            db.rollback()
+            logger.exception("XP flush failed, %d completions re-queued", len(ids))
+            with self._lock:
+                self._pending_ids[:0] = ids
+                for user_id, points in deltas.items():
+                    self._user_deltas[user_id] += points
+            return 0
+        finally:
+            db.close()
+
+    def recover(self) -> int:
+        """Apply XP for completions left pending by a worker that died before flushing."""
+        recovered = 0
+        db = SessionLocal()
+        try:
+            while True:
+                # Completions claimed, not users updated: a batch whose users are gone still counts
+                claimed = db.execute(RECOVER_PENDING_XP, {"grace": self.recovery_grace, "limit": FLUSH_BATCH_SIZE}).scalar()
+                db.commit()
+                if not claimed:
+                    break
+                recovered += claimed
+        except Exception:
+            db.rollback()
+            logger.exception("XP recovery failed")
+        finally:
+            db.close()
+        if recovered:
+            logger.warning("Recovered pending XP for %d completions", recovered)
+        return recovered
+
+    def _run(self) -> None:
+        self.recover()
+        ticks_per_recovery = max(1, int(RECOVERY_INTERVAL_SECONDS / self.interval))
+        tick = 0
+        while not self._stop.wait(self.interval):
+            self.flush()
+            tick += 1
+            if tick % ticks_per_recovery == 0:
+                self.recover()
+        self.flush()
+
+    def start(self, interval_ms: int, recovery_grace_seconds: int) -> None:
+        if self.running:
+            return
+        self.interval = interval_ms / 1000
+        self.recovery_grace = recovery_grace_seconds
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="xp-write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+
+xp_buffer = XPBuffer()
@@ -1,50 +1,371 @@
 # utils/s3.py
-import io
-import boto3
+import hashlib
+import logging
+import tempfile
+import threading
 import uuid
 import os
+from contextlib import contextmanager
+from typing import AsyncIterable, Iterable, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.metrics import Counter, Gauge, observe_dependency, registry
+
+logger = logging.getLogger(__name__)
 
-AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
-AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_REGION = os.getenv("AWS_REGION")
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
 
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION
-)
-
-def upload_image_to_s3(file, folder="project-images"):
-    file_extension = file.filename.split(".")[-1]
-    filename = f"{folder}/{uuid.uuid4()}.{file_extension}"
-
-    s3.upload_fileobj(
-        file.file,
-        S3_BUCKET_NAME,
-        filename,
-        ExtraArgs={"ContentType": file.content_type}  # ✅ Removed ACL
+# S3-compatible stand-in for local runs and tests (MinIO, moto_server); unset means AWS
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+
+# Client tuning: the pool must cover concurrent uploads (threadpool + image/NFT workers);
+# botocore's default of 10 connections makes a burst queue up behind each other
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50"))
+S3_RETRY_MODE = os.getenv("S3_RETRY_MODE", "adaptive")  # "adaptive" | "standard" | "legacy"
+S3_MAX_ATTEMPTS = int(os.getenv("S3_MAX_ATTEMPTS", "5"))
+S3_CONNECT_TIMEOUT_SECONDS = float(os.getenv("S3_CONNECT_TIMEOUT_SECONDS", "5"))
+S3_READ_TIMEOUT_SECONDS = float(os.getenv("S3_READ_TIMEOUT_SECONDS", "30"))
+
+# Streaming uploads hold one part in memory; S3 needs parts of at least 5 MiB (except the last)
+MIN_PART_SIZE = 5 * 1024 * 1024
+S3_PART_SIZE = max(int(os.getenv("S3_PART_SIZE_BYTES", str(8 * 1024 * 1024))), MIN_PART_SIZE)
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Direct browser uploads (presigned POST): accepted types, size cap, URL lifetime
+IMAGE_CONTENT_TYPES = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp", "image/gif": "gif"}
+S3_MAX_IMAGE_UPLOAD_BYTES = int(os.getenv("S3_MAX_IMAGE_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+S3_PRESIGN_EXPIRES_SECONDS = int(os.getenv("S3_PRESIGN_EXPIRES_SECONDS", "300"))
+
+PROJECT_IMAGE_FOLDER = "project-images"
+
+# Image keys never change content (API uploads are keyed by the SHA-256 of their
+# bytes, presigned ones by a fresh UUID), so browsers and the CDN may keep them for good
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+UPLOADS_DEDUPLICATED = registry.register(Counter(
+    "s3_uploads_deduplicated_total", "Uploads skipped because the same content was already stored.", ("folder",)))
+
+S3_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "s3_requests_in_flight", "S3 API calls currently running.", ("operation",)))
+S3_UPLOADS_IN_FLIGHT = registry.register(Gauge(
+    "s3_uploads_in_flight", "Object uploads (single or multipart) currently running."))
+S3_POOL_CONNECTIONS = registry.register(Gauge(
+    "s3_pool_max_connections", "Size of the S3 client's connection pool."))
+
+_s3 = None
+_s3_lock = threading.Lock()
+
+
+def build_s3_client(max_pool_connections: int = S3_MAX_POOL_CONNECTIONS):
+    import boto3  # lazy: only upload routes need it
+    from botocore.config import Config
+
+    config = Config(
+        max_pool_connections=max_pool_connections,
+        retries={"mode": S3_RETRY_MODE, "max_attempts": S3_MAX_ATTEMPTS},
+        connect_timeout=S3_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=S3_READ_TIMEOUT_SECONDS,
+        tcp_keepalive=True,
     )
+    # A private session: the default one is not safe to create clients from concurrently
+    return boto3.session.Session().client("s3", endpoint_url=S3_ENDPOINT_URL, region_name=AWS_REGION,
+                                          config=config)
+
 
-    url = f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{filename}"
-    return url
+def get_s3_client():
+    """
+    The process-wide S3 client, built on first use (credentials come from the
+    standard AWS env/config chain). botocore clients are thread-safe, so every
+    thread shares this one and its connection pool.
+    """
+    global _s3
+    if _s3 is None:
+        with _s3_lock:
+            if _s3 is None:
+                _s3 = build_s3_client()
+                S3_POOL_CONNECTIONS.set(S3_MAX_POOL_CONNECTIONS)
+    return _s3
 
 
-AWS_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
+@contextmanager
+def observe_s3(operation: str):
+    """``observe_dependency`` for one S3 call, plus the in-flight gauge."""
+    S3_REQUESTS_IN_FLIGHT.inc(operation=operation)
+    try:
+        with observe_dependency("s3", operation):
+            yield
+    finally:
+        S3_REQUESTS_IN_FLIGHT.dec(operation=operation)
 
-s3 = boto3.client("s3")
 
-def upload_image_bytes_to_s3(image_bytes, key=None):
-    if not key:
-        key = f"nfts/{uuid.uuid4()}.png"
-    
-    print("Uploading to S3...")
-    
-    s3.upload_fileobj(
-        Fileobj=io.BytesIO(image_bytes),
-        Bucket=AWS_BUCKET_NAME,
+def object_url(key: str, bucket: Optional[str] = None) -> str:
+    bucket = bucket or S3_BUCKET_NAME
+    if S3_ENDPOINT_URL:
+        return f"{S3_ENDPOINT_URL.rstrip('/')}/{bucket}/{key}"
+    if AWS_REGION:
+        return f"https://{bucket}.s3.{AWS_REGION}.amazonaws.com/{key}"
+    return f"https://{bucket}.s3.amazonaws.com/{key}"
+
+
+def key_from_url(url: Optional[str]) -> Optional[str]:
+    """The bucket key behind one of our object URLs; None for anything else (e.g. X avatars)."""
+    if not url:
+        return None
+    for base in (object_url(""), f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/"):
+        if url.startswith(base):
+            return url[len(base):] or None
+    return None
+
+
+def object_exists(key: str, bucket: Optional[str] = None) -> bool:
+    from botocore.exceptions import ClientError
+
+    try:
+        with observe_s3("head_object"):
+            get_s3_client().head_object(Bucket=bucket or S3_BUCKET_NAME, Key=key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+    return True
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class InvalidUpload(ValueError):
+    pass
+
+
+def presign_image_upload(folder: str, content_type: str) -> dict:
+    """Presigned POST for uploading one image straight to the bucket; S3 enforces type and size."""
+    extension = IMAGE_CONTENT_TYPES.get(content_type)
+    if extension is None:
+        raise InvalidUpload(f"Unsupported image type: {content_type}")
+    key = f"{folder}/{uuid.uuid4()}.{extension}"
+    post = get_s3_client().generate_presigned_post(
+        Bucket=S3_BUCKET_NAME,
         Key=key,
-        ExtraArgs={"ContentType": "image/png"}
+        Fields={"Content-Type": content_type, "Cache-Control": IMMUTABLE_CACHE_CONTROL},
+        Conditions=[{"Content-Type": content_type}, {"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+                    ["content-length-range", 1, S3_MAX_IMAGE_UPLOAD_BYTES]],
+        ExpiresIn=S3_PRESIGN_EXPIRES_SECONDS,
     )
-    return f"https://{AWS_BUCKET_NAME}.s3.amazonaws.com/{key}"
\ No newline at end of file
+    return {
+        "upload_url": post["url"],
+        "fields": post["fields"],
+        "key": key,
+        "max_bytes": S3_MAX_IMAGE_UPLOAD_BYTES,
+        "expires_in": S3_PRESIGN_EXPIRES_SECONDS,
+    }
+
+
+def verify_uploaded_image(key: str, folder: str) -> str:
+    """Check a presigned upload landed (and is an image within the cap); returns its URL."""
+    if not key.startswith(f"{folder}/") or ".." in key:
+        raise InvalidUpload("Unknown upload key")
+    from botocore.exceptions import ClientError
+
+    try:
+        with observe_s3("head_object"):
+            head = get_s3_client().head_object(Bucket=S3_BUCKET_NAME, Key=key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            raise InvalidUpload("Upload not found; upload the image before finalizing")
+        raise
+    if head.get("ContentType") not in IMAGE_CONTENT_TYPES or head["ContentLength"] > S3_MAX_IMAGE_UPLOAD_BYTES:
+        raise InvalidUpload("Uploaded object is not an accepted image")
+    return object_url(key)
+
+
+def resolve_image_url(image, image_key: Optional[str], folder: str = PROJECT_IMAGE_FOLDER) -> Optional[str]:
+    """URL for a multipart image, or for one uploaded directly via /image-upload."""
+    if image_key:
+        try:
+            return verify_uploaded_image(image_key, folder)
+        except InvalidUpload as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if image:
+        return upload_image_to_s3(image, folder)
+    return None
+
+
+class S3StreamWriter:
+    """
+    Uploads a stream of chunks to S3 holding at most about one part in memory.
+
+    Small objects (one part or less) go up with a single PutObject; larger
+    ones become a multipart upload, one part per ``part_size`` bytes. Use it
+    as a context manager so a failed stream aborts its multipart upload.
+    """
+
+    def __init__(self, key: str, content_type: str, bucket: Optional[str] = None,
+                 part_size: int = S3_PART_SIZE, max_bytes: Optional[int] = None,
+                 cache_control: Optional[str] = None) -> None:
+        self.key = key
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.bucket = bucket or S3_BUCKET_NAME
+        self.part_size = part_size
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: list[dict] = []
+
+    def buffer(self, data: bytes) -> bool:
+        """Add a chunk; True once a full part is waiting for ``flush_parts``."""
+        self.size += len(data)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise UploadTooLarge(f"{self.key} exceeds {self.max_bytes} bytes")
+        self._buffer += data
+        return len(self._buffer) >= self.part_size
+
+    def flush_parts(self) -> None:
+        while len(self._buffer) >= self.part_size:
+            with memoryview(self._buffer) as view:
+                body = bytes(view[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._upload_part(body)
+
+    def write(self, data: bytes) -> None:
+        if self.buffer(data):
+            self.flush_parts()
+
+    def close(self) -> str:
+        """Finish the upload and return the object's URL."""
+        client = get_s3_client()
+        body, self._buffer = bytes(self._buffer), bytearray()
+        if self._upload_id is None:
+            with observe_s3("upload"):
+                client.put_object(Bucket=self.bucket, Key=self.key, Body=body, **self._object_args())
+        else:
+            if body:
+                self._upload_part(body)
+            with observe_s3("complete_multipart_upload"):
+                client.complete_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                    MultipartUpload={"Parts": self._parts},
+                )
+            self._upload_id = None
+        return object_url(self.key, self.bucket)
+
+    def abort(self) -> None:
+        self._buffer = bytearray()
+        if self._upload_id is None:
+            return
+        try:
+            with observe_s3("abort_multipart_upload"):
+                get_s3_client().abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+        except Exception as e:
+            # A lifecycle rule on the bucket cleans up whatever is left
+            logger.warning("Could not abort multipart upload of %s: %r", self.key, e)
+        self._upload_id = None
+
+    def _upload_part(self, body: bytes) -> None:
+        client = get_s3_client()
+        if self._upload_id is None:
+            with observe_s3("create_multipart_upload"):
+                self._upload_id = client.create_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, **self._object_args())["UploadId"]
+        number = len(self._parts) + 1
+        with observe_s3("upload_part"):
+            etag = client.upload_part(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                                      PartNumber=number, Body=body)["ETag"]
+        self._parts.append({"ETag": etag, "PartNumber": number})
+
+    def _object_args(self) -> dict:
+        args = {"ContentType": self.content_type}
+        if self.cache_control:
+            args["CacheControl"] = self.cache_control
+        return args
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+
+
+def upload_stream_to_s3(chunks: Iterable[bytes], key: str, content_type: str,
+                        max_bytes: Optional[int] = None, cache_control: Optional[str] = None) -> str:
+    S3_UPLOADS_IN_FLIGHT.inc()
+    try:
+        with S3StreamWriter(key, content_type, max_bytes=max_bytes, cache_control=cache_control) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+            return writer.close()
+    finally:
+        S3_UPLOADS_IN_FLIGHT.dec()
+
+
+def content_key(folder: str, digest: str, extension: str) -> str:
+    return f"{folder}/{digest}.{extension}"
+
+
+def upload_content_addressed(fileobj, folder: str, extension: str, content_type: str,
+                             digest: Optional[str] = None) -> str:
+    """
+    Store a seekable file under ``folder/<sha256>.<ext>`` and return its URL.
+
+    If an object with that key already exists the bytes are identical, so the
+    upload is skipped. ``digest`` saves the hashing pass when the caller
+    already computed it while receiving the data.
+    """
+    fileobj.seek(0)
+    if digest is None:
+        sha = hashlib.sha256()
+        for chunk in iter(lambda: fileobj.read(READ_CHUNK_SIZE), b""):
+            sha.update(chunk)
+        digest = sha.hexdigest()
+        fileobj.seek(0)
+
+    key = content_key(folder, digest, extension)
+    if object_exists(key):
+        UPLOADS_DEDUPLICATED.inc(folder=folder)
+        logger.debug("s3://%s/%s already stored; upload skipped", S3_BUCKET_NAME, key)
+        return object_url(key)
+    chunks = iter(lambda: fileobj.read(READ_CHUNK_SIZE), b"")
+    return upload_stream_to_s3(chunks, key, content_type, cache_control=IMMUTABLE_CACHE_CONTROL)
+
+
+async def upload_async_stream_to_s3(chunks: AsyncIterable[bytes], folder: str, extension: str,
+                                    content_type: str, max_bytes: Optional[int] = None) -> str:
+    """
+    Content-addressed upload of an async byte stream (e.g. an httpx download).
+
+    The key depends on the hash of the whole stream, so it is hashed while
+    being spooled (in memory up to one part, on local disk beyond that) and
+    uploaded afterwards by ``upload_content_addressed``; file and S3 calls
+    run on the threadpool.
+    """
+    sha = hashlib.sha256()
+    size = 0
+    pending = bytearray()
+    with tempfile.SpooledTemporaryFile(max_size=S3_PART_SIZE) as spool:
+        async for chunk in chunks:
+            size += len(chunk)
+            if max_bytes is not None and size > max_bytes:
+                raise UploadTooLarge(f"{folder} upload exceeds {max_bytes} bytes")
+            sha.update(chunk)
+            pending += chunk
+            if len(pending) >= READ_CHUNK_SIZE:
+                await run_in_threadpool(spool.write, pending)
+                pending = bytearray()
+        if pending:
+            await run_in_threadpool(spool.write, pending)
+        return await run_in_threadpool(upload_content_addressed, spool, folder, extension,
+                                       content_type, sha.hexdigest())
+
+
+def upload_image_to_s3(file, folder=PROJECT_IMAGE_FOLDER):
+    file_extension = file.filename.split(".")[-1].lower()
+
+    # Starlette spools the multipart body to a temp file, so it can be hashed and then read back
+    return upload_content_addressed(file.file, folder, file_extension,
+                                    file.content_type or "application/octet-stream")
@@ -0,0 +1,77 @@
+"""
+Latency of a cheap DB-style route while a slow upstream route floods the
+shared threadpool, with and without BulkheadMiddleware.
+
+    python -m benchmarks.bench_bulkheads [slow-requests] [upstream-seconds]
+
+A toy app has two sync endpoints: ``POST /slow`` sleeps like a hung Neynar
+call, and ``GET /fast`` returns at once. The benchmark fires a burst of slow
+requests, then measures ``/fast`` while the burst is still running. Without
+bulkheads the slow calls take every thread and ``/fast`` queues behind them.
+With bulkheads the "neynar" class holds at most its limit, sheds the rest
+with 503s, and leaves threads free for ``/fast``.
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.bulkhead import BulkheadMiddleware, set_threadpool_size
+
+THREADS = 16
+LIMITS = "db=16:32,neynar=6:6"
+
+
+def build_app(upstream_seconds, bulkheads):
+    app = FastAPI()
+
+    @app.post("/slow")
+    def slow():
+        time.sleep(upstream_seconds)
+        return {"ok": True}
+
+    @app.get("/fast")
+    def fast():
+        return {"ok": True}
+
+    if bulkheads:
+        app.add_middleware(BulkheadMiddleware, limits=LIMITS, route_classes={"neynar": ["POST /slow"]})
+    return app
+
+
+async def scenario(slow_requests, upstream_seconds, bulkheads):
+    set_threadpool_size(THREADS)
+    app = build_app(upstream_seconds, bulkheads)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        burst = [asyncio.create_task(client.post("/slow")) for _ in range(slow_requests)]
+        await asyncio.sleep(0.05)  # let the burst take its threads
+
+        async def timed_fast():
+            start = time.perf_counter()
+            await client.get("/fast")
+            return time.perf_counter() - start
+
+        latencies = await asyncio.gather(*(timed_fast() for _ in range(20)))
+
+        statuses = [r.status_code for r in await asyncio.gather(*burst)]
+    return latencies, statuses.count(200), statuses.count(503)
+
+
+def main():
+    slow_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    upstream_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+
+    print(f"{THREADS} threads, {slow_requests} slow requests of {upstream_seconds}s, bulkheads {LIMITS}")
+    print(f"{'':<18}{'fast p50 ms':>12}{'fast max ms':>12}{'slow ok':>9}{'slow 503':>10}")
+    for name, bulkheads in (("shared pool", False), ("bulkheads", True)):
+        latencies, ok, shed = asyncio.run(scenario(slow_requests, upstream_seconds, bulkheads))
+        print(f"{name:<18}{statistics.median(latencies) * 1000:>12.1f}{max(latencies) * 1000:>12.1f}"
+              f"{ok:>9}{shed:>10}")
+
+
+if __name__ == "__main__":
+    main()
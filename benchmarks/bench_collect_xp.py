@@ -0,0 +1,124 @@
+"""
+Concurrency benchmark for XP collection (needs a Postgres DATABASE_URL).
+
+Creates a throwaway project, quests and users, then hammers
+collect_project_xp from many threads. Every (user, quest) pair is claimed
+several times at once to simulate double-clicks; the run fails if anyone is
+awarded twice or if the XP totals do not match the completion rows.
+
+    python -m benchmarks.bench_collect_xp [users] [quests] [dupes] [threads] [write-behind]
+
+Pass "write-behind" as the last argument to claim through the
+app.services.xp_buffer path instead; totals are checked after the final flush.
+"""
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import DATABASE_URL
+from app.models.project import Project
+from app.models.quests import Quest
+from app.models.user import User
+from app.models.user_completed_quest import UserCompletedQuest
+from app.models.user_project_xp import UserProjectXP
+from app.services.xp import collect_project_xp, record_pending_project_completion
+from app.services import xp_buffer as xp_buffer_module
+from app.services.xp_buffer import xp_buffer
+
+POINTS, PROJECT_POINTS, START_XP = 10, 25, 100
+
+SessionLocal = sessionmaker(autoflush=False)
+
+
+def _setup(n_users, n_quests):
+    tag = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    project = Project(name=f"bench-{tag}", twitter_username=f"bench-{tag}", description="bench")
+    db.add(project)
+    db.flush()
+    quests = [Quest(project_id=project.id, title=f"q{i}", description="bench",
+                    points=POINTS, project_points=PROJECT_POINTS) for i in range(n_quests)]
+    users = [User(username=f"bench-{tag}-{i}", xp=START_XP) for i in range(n_users)]
+    db.add_all(quests + users)
+    db.commit()
+    ids = project.id, [q.id for q in quests], [u.id for u in users]
+    db.close()
+    return ids
+
+
+def _claim(args):
+    user_id, quest_id = args
+    db = SessionLocal()
+    try:
+        award = collect_project_xp(db, user_id, quest_id)
+        db.commit()
+        return award.awarded
+    finally:
+        db.close()
+
+
+def _claim_write_behind(args):
+    user_id, quest_id = args
+    db = SessionLocal()
+    try:
+        award, completion_id = record_pending_project_completion(db, user_id, quest_id)
+        db.commit()
+        if award.awarded:
+            xp_buffer.add(completion_id, user_id, award.points)
+        return award.awarded
+    finally:
+        db.close()
+
+
+def main(n_users=200, n_quests=5, dupes=4, threads=32, mode="sync"):
+    SessionLocal.configure(bind=create_engine(DATABASE_URL, pool_size=threads + 1, max_overflow=0))
+    write_behind = mode == "write-behind"
+    if write_behind:
+        xp_buffer_module.SessionLocal = SessionLocal
+        xp_buffer.start(interval_ms=250, recovery_grace_seconds=60)
+    project_id, quest_ids, user_ids = _setup(n_users, n_quests)
+    claims = [(u, q) for u in user_ids for q in quest_ids for _ in range(dupes)]
+    random.shuffle(claims)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        awarded = sum(pool.map(_claim_write_behind if write_behind else _claim, claims))
+    elapsed = time.perf_counter() - start
+    if write_behind:
+        xp_buffer.stop()
+
+    db = SessionLocal()
+    completions = db.scalar(select(func.count()).select_from(UserCompletedQuest).where(
+        UserCompletedQuest.user_id.in_(user_ids)))
+    user_xp = db.scalar(select(func.sum(User.xp)).where(User.id.in_(user_ids)))
+    project_xp = db.scalar(select(func.sum(UserProjectXP.xp)).where(UserProjectXP.project_id == project_id))
+
+    expected = n_users * n_quests
+    print(f"[{mode}] {len(claims)} claims ({dupes} per pair) on {threads} threads: "
+          f"{elapsed:.2f}s, {len(claims) / elapsed:,.0f} claims/s")
+    print(f"awarded={awarded} completions={completions} expected={expected}")
+    ok = (
+        awarded == completions == expected
+        and user_xp == n_users * START_XP + expected * POINTS
+        and project_xp == expected * PROJECT_POINTS
+    )
+
+    db.execute(delete(User).where(User.id.in_(user_ids)))
+    db.execute(delete(Project).where(Project.id == project_id))
+    db.commit()
+    db.close()
+
+    if not ok:
+        sys.exit(f"double award or lost update: user_xp={user_xp} project_xp={project_xp}")
+    print("no double awards, XP totals consistent")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    mode = args.pop() if args and not args[-1].isdigit() else "sync"
+    main(*(int(a) for a in args), mode=mode)
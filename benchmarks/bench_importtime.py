@@ -0,0 +1,70 @@
+"""
+Import-time report for `import app.main` (python -X importtime).
+
+Prints the total import time, the peak RSS of the importing process and the
+slowest top-level imports. Exits non-zero if any module listed in
+app.core.prewarm.HEAVY_MODULES is imported at boot, or if the total exceeds
+the optional budget, so it can run as a CI check.
+
+    python -m benchmarks.bench_importtime [top] [budget-ms]
+"""
+import subprocess
+import sys
+
+from app.core.prewarm import HEAVY_MODULES
+
+PROBE = """
+import resource, sys
+import app.main
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+print(" ".join(sorted(sys.modules)))
+"""
+
+
+def _parse(stderr):
+    """Yield (cumulative_us, depth, module) for each importtime line."""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        yield int(cumulative), depth, name.strip()
+
+
+def main():
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", PROBE],
+        capture_output=True, text=True, check=True,
+    )
+    rss_kb, modules = proc.stdout.strip().splitlines()[-2:]
+    loaded = set(modules.split())
+    entries = list(_parse(proc.stderr))
+
+    # Depth 0 covers the interpreter's own startup plus app.main; depth 1 is
+    # what app.main (and its first importers) pulled in
+    total_ms = sum(e[0] for e in entries if e[1] == 0) / 1000
+    children = sorted((e for e in entries if e[1] == 1), reverse=True)
+
+    print(f"total import time {total_ms:8.1f} ms")
+    print(f"peak RSS          {int(rss_kb) / 1024:8.1f} MB")
+    print("\nslowest imports under app.main:")
+    for cumulative, _, name in children[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    eager = [m for m in HEAVY_MODULES if m in loaded]
+    failed = False
+    if eager:
+        print(f"\nFAIL heavy modules imported at boot: {', '.join(eager)}")
+        failed = True
+    if budget_ms is not None and total_ms > budget_ms:
+        print(f"\nFAIL import time over budget ({total_ms:.0f} > {budget_ms:.0f} ms)")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Throughput of the Neynar diagnostics: the old print() calls vs the logging
+pipeline (app.core.log) inline and queued, at INFO and DEBUG.
+
+Each "call" emits what one quest verification used to print: URL, params,
+status, the full response body and the parsed metadata. Worker threads
+stand in for the request threadpool; output goes to a real file so the
+write cost is included. "caller" is the time the request threads spent
+logging, "drained" includes the queue listener catching up, "dropped" counts
+records shed because the queue (LOG_QUEUE_SIZE) was full.
+
+    python -m benchmarks.bench_logging [calls-per-thread] [threads] [body-bytes]
+"""
+import contextlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from app.core import log
+from app.core.config import settings
+from app.services import farcaster_api
+
+
+class FakeResponse:
+    status_code = 200
+    url = "https://api.neynar.com/v2/farcaster/cast?identifier=https%3A%2F%2Fwarpcast.com%2Fx%2F0xabc&type=url"
+
+    def __init__(self, body_bytes):
+        cast = {"hash": "0xabc", "author": {"fid": 3}, "text": "x" * body_bytes,
+                "viewer_context": {"liked": True, "recasted": False}}
+        self.text = json.dumps({"cast": cast})
+
+
+def old_print(response, params, meta):
+    print(f"[get_cast_metadata_from_url] Request URL: {response.url}")
+    print(f"[get_cast_metadata_from_url] Params: {params}")
+    print(f"[get_cast_metadata_from_url] Status Code: {response.status_code}")
+    print(f"[get_cast_metadata_from_url] Response: {response.text}")
+    print(f"[has_liked_cast] Meta: {meta}")
+
+
+def new_logging(response, params, meta):
+    farcaster_api._log_response("get_cast_metadata_from_url", response)
+    farcaster_api.logger.debug("has_liked_cast: fid=%s meta=%s", 3, meta)
+
+
+def run(emit, calls, threads, response):
+    params = {"identifier": "https://warpcast.com/x/0xabc", "type": "url", "viewer_fid": 3}
+    meta = {"target_hash": "0xabc", "target_fid": 3, "liked": True, "recasted": False}
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(calls):
+            emit(response, params, meta)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - start
+
+
+def dropped():
+    return log.LOG_RECORDS_DROPPED._values.get((), 0)
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    body = int(sys.argv[3]) if len(sys.argv) > 3 else 4096
+    response = FakeResponse(body)
+    total = calls * threads
+
+    print(f"{threads} threads x {calls} calls, {len(response.text)} byte response bodies")
+    print(f"{'mode':<22}{'caller s':>10}{'calls/s':>12}{'drained s':>11}{'bytes out':>12}{'dropped':>9}")
+
+    modes = [
+        ("print (before)", None, None),
+        ("inline INFO", False, "INFO"),
+        ("queued INFO", True, "INFO"),
+        ("inline DEBUG", False, "DEBUG"),
+        ("queued DEBUG", True, "DEBUG"),
+    ]
+    for name, use_queue, level in modes:
+        dropped_before = dropped()
+        with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False) as out:
+            path = out.name
+            if use_queue is None:
+                with contextlib.redirect_stdout(out):
+                    caller = run(old_print, calls, threads, response)
+                    out.flush()
+                drained = caller
+            else:
+                settings.LOG_LEVEL = level
+                log.configure_logging(stream=out, use_queue=use_queue)
+                start = time.perf_counter()
+                caller = run(new_logging, calls, threads, response)
+                log.shutdown_logging()
+                drained = time.perf_counter() - start
+                out.flush()
+        size = os.path.getsize(path)
+        os.unlink(path)
+        print(f"{name:<22}{caller:>10.3f}{total / caller:>12,.0f}{drained:>11.3f}{size:>12,}{dropped() - dropped_before:>9}")
+
+    logging.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Burst of concurrent uploads through one shared S3 client: botocore's default
+pool (10 connections) vs the configured S3_MAX_POOL_CONNECTIONS.
+
+Needs an S3 endpoint; run it against a local stand-in, e.g.
+
+    moto_server -p 5055 &   # or MinIO
+    S3_ENDPOINT_URL=http://localhost:5055 S3_BUCKET_NAME=bench AWS_REGION=us-east-1 \\
+        AWS_ACCESS_KEY_ID=x AWS_SECRET_ACCESS_KEY=x python -m benchmarks.bench_s3_pool [uploads] [threads] [kb]
+
+With a pool smaller than the number of threads urllib3 keeps opening extra
+connections and throwing them away ("Connection pool is full"); the
+"discarded" column counts those, each one a fresh TCP (and on AWS, TLS)
+handshake.
+"""
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils import s3
+
+
+class _PoolFullCounter(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def emit(self, record):
+        if "pool is full" in record.getMessage():
+            self.count += 1
+
+
+def burst(client, uploads, threads, body):
+    def put(i):
+        client.put_object(Bucket=s3.S3_BUCKET_NAME, Key=f"bench/pool-{i}.bin", Body=body)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(put, range(uploads)))
+    return time.perf_counter() - start
+
+
+def main():
+    if not s3.S3_ENDPOINT_URL:
+        sys.exit("Set S3_ENDPOINT_URL to a local S3 stand-in (see the module docstring)")
+    uploads = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    body = b"\x89" * (int(sys.argv[3]) if len(sys.argv) > 3 else 64) * 1024
+
+    counter = _PoolFullCounter()
+    pool_logger = logging.getLogger("urllib3.connectionpool")
+    pool_logger.addHandler(counter)
+    pool_logger.setLevel(logging.WARNING)
+
+    client = s3.get_s3_client()
+    try:
+        client.create_bucket(Bucket=s3.S3_BUCKET_NAME)
+    except client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+
+    print(f"{uploads} uploads of {len(body) // 1024} KiB from {threads} threads")
+    print(f"{'pool':>6}{'seconds':>10}{'uploads/s':>12}{'discarded':>11}")
+    for size in (10, s3.S3_MAX_POOL_CONNECTIONS):
+        client = s3.build_s3_client(max_pool_connections=size)
+        burst(client, threads, threads, body)  # warm up connections
+        counter.count = 0
+        elapsed = burst(client, uploads, threads, body)
+        print(f"{size:>6}{elapsed:>10.2f}{uploads / elapsed:>12.0f}{counter.count:>11}")
+
+
+if __name__ == "__main__":
+    main()
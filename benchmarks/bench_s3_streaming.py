@@ -0,0 +1,78 @@
+"""
+Peak Python memory of an image upload: whole object in memory (the old
+download-then-PutObject path) vs the streaming S3StreamWriter, for growing
+object sizes.
+
+Needs an S3 endpoint; run it against a local stand-in, e.g.
+
+    moto_server -p 5055 &   # or MinIO
+    S3_ENDPOINT_URL=http://localhost:5055 S3_BUCKET_NAME=bench AWS_REGION=us-east-1 \\
+        AWS_ACCESS_KEY_ID=x AWS_SECRET_ACCESS_KEY=x python -m benchmarks.bench_s3_streaming [max-mb]
+
+Peak memory is measured with tracemalloc; the streaming column should stay
+near two parts (S3_PART_SIZE_BYTES) however large the object gets.
+"""
+import sys
+import time
+import tracemalloc
+
+from app.utils import s3
+
+CHUNK = 64 * 1024
+
+
+def chunks(total):
+    block = b"\x89" * CHUNK
+    sent = 0
+    while sent < total:
+        n = min(CHUNK, total - sent)
+        yield block[:n]
+        sent += n
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def buffered(total, key):
+    data = b"".join(chunks(total))  # what requests.get(...).content did
+    s3.get_s3_client().put_object(Bucket=s3.S3_BUCKET_NAME, Key=key, Body=data, ContentType="image/png")
+
+
+def streamed(total, key):
+    s3.upload_stream_to_s3(chunks(total), key, "image/png")
+
+
+def main():
+    if not s3.S3_ENDPOINT_URL:
+        sys.exit("Set S3_ENDPOINT_URL to a local S3 stand-in (see the module docstring)")
+    max_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+
+    client = s3.get_s3_client()
+    try:
+        client.create_bucket(Bucket=s3.S3_BUCKET_NAME)
+    except client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+    s3.get_s3_client().list_buckets()  # warm the client outside the measurements
+
+    print(f"part size {s3.S3_PART_SIZE // 2**20} MiB")
+    print(f"{'object':>8}{'buffered peak':>16}{'streamed peak':>16}{'buffered s':>12}{'streamed s':>12}")
+    size = 1
+    while size <= max_mb:
+        total = size * 2**20
+        b_peak, b_time = measure(buffered, total, f"bench/buffered-{size}.png")
+        s_peak, s_time = measure(streamed, total, f"bench/streamed-{size}.png")
+        head = client.head_object(Bucket=s3.S3_BUCKET_NAME, Key=f"bench/streamed-{size}.png")
+        assert head["ContentLength"] == total, head["ContentLength"]
+        print(f"{size:>6}MB{b_peak / 2**20:>14.1f}MB{s_peak / 2**20:>14.1f}MB{b_time:>12.2f}{s_time:>12.2f}")
+        size *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Serialization cost of the list endpoints, per 10k rows.
+
+"fastapi" is the default path (response_model validation + jsonable_encoder +
+json.dumps); "adapter" is app.core.serialization.json_response.
+
+    python -m benchmarks.bench_serialization [rows]
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.serialization import json_response
+from app.schemas.project_schema import ProjectListAdapter, ProjectListItem
+from app.schemas.quest_schema import QuestListAdapter, QuestOut, QuestSummary, QuestSummaryListAdapter
+
+
+def _projects(n):
+    return [
+        SimpleNamespace(id=i, name=f"Project {i}", twitter_username=f"proj{i}",
+                        description="A project description " * 4,
+                        image_url=f"https://bucket.s3.amazonaws.com/project-images/{i}.png",
+                        project_type="NFT")
+        for i in range(n)
+    ]
+
+
+def _quest_summaries(n):
+    return [
+        SimpleNamespace(id=i, project_id=i % 50, title=f"Quest {i}", description="Do the thing " * 5,
+                        points=10, project_points=25)
+        for i in range(n)
+    ]
+
+
+def _quests(n):
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(id=i, project_id=i % 50, title=f"Quest {i}", description="Do the thing " * 5,
+                        created_at=now, completed=False,
+                        actions=[SimpleNamespace(id=i * 2 + k, type="follow", button_type="Follow",
+                                                 target_url="https://x.com/glaria") for k in range(2)])
+        for i in range(n)
+    ]
+
+
+def _fastapi_path(model, rows):
+    field = create_model_field(name="Response", type_=List[model], mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=rows, is_coroutine=False))
+    return JSONResponse(content).body
+
+
+def _adapter_path(adapter, rows):
+    return json_response(adapter, rows).body
+
+
+def _best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(rows: int = 10_000):
+    cases = [
+        ("projects", ProjectListItem, ProjectListAdapter, _projects(rows)),
+        ("quest summaries", QuestSummary, QuestSummaryListAdapter, _quest_summaries(rows)),
+        ("quests + actions", QuestOut, QuestListAdapter, _quests(rows)),
+    ]
+    print(f"{'endpoint payload':<18} {'fastapi ms':>11} {'adapter ms':>11} {'speedup':>8}")
+    for name, model, adapter, data in cases:
+        before = _best_of(lambda: _fastapi_path(model, data))
+        after = _best_of(lambda: _adapter_path(adapter, data))
+        scale = 10_000 / rows
+        print(f"{name:<18} {before * 1000 * scale:>11.1f} {after * 1000 * scale:>11.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,56 @@
+"""
+Cold-start time of the API, measured in fresh interpreters.
+
+"import" is `import app.main`; "ready" also runs the lifespan startup and
+serves GET / (what a new worker does before it can take traffic).
+
+    python -m benchmarks.bench_startup [runs] [unreachable-db]
+
+Pass "unreachable-db" to point DATABASE_URL at a blackholed address; startup
+should not slow down, since nothing touches the database until a request
+needs it (leave RUN_MIGRATIONS_ON_STARTUP off for that run).
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    assert client.get("/").status_code == 200
+    t2 = time.perf_counter()
+print(t1 - t0, t2 - t0)
+"""
+
+
+def _run_once(env):
+    out = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", PROBE],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout.strip().splitlines()[-1]
+    imported, ready = (float(v) for v in out.split())
+    return imported, ready
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    env = dict(os.environ)
+    if "unreachable-db" in sys.argv[2:]:
+        env["DATABASE_URL"] = "postgresql://postgres@10.255.255.1/glaria?connect_timeout=10"
+
+    _run_once(env)  # warm the filesystem / bytecode caches
+    samples = [_run_once(env) for _ in range(runs)]
+
+    for label, values in (("import", [s[0] for s in samples]), ("ready", [s[1] for s in samples])):
+        values = [v * 1000 for v in values]
+        print(f"{label:<7} median {statistics.median(values):7.1f} ms   "
+              f"min {min(values):7.1f} ms   max {max(values):7.1f} ms   ({runs} runs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Plan check for the hot query patterns (needs a Postgres DATABASE_URL).
+
+Runs EXPLAIN for each lookup the busy routes issue and fails if any of them
+would read its table with a sequential scan. Seq scans are disabled for the
+check so the planner picks an index whenever one can serve the query, even
+on a small test database.
+
+    python -m benchmarks.explain_hot_queries
+"""
+import sys
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.database import DATABASE_URL
+from app.models.farcaster import FarcasterQuest, FarcasterUserCompletedQuest
+from app.models.quests import Quest
+from app.models.user import User
+from app.models.user_completed_quest import UserCompletedQuest
+from app.models.user_project_xp import UserProjectXP
+
+# (name, statement, table that must be read through an index)
+HOT_QUERIES = [
+    (
+        "farcaster claim duplicate check",
+        select(FarcasterUserCompletedQuest.id).where(
+            FarcasterUserCompletedQuest.farcaster_user_id == 1,
+            FarcasterUserCompletedQuest.quest_id == 1,
+        ),
+        "farcaster_user_completed_quests",
+    ),
+    (
+        "completed quests by user",
+        select(func.count()).select_from(UserCompletedQuest).where(UserCompletedQuest.user_id == 1),
+        "user_completed_quests",
+    ),
+    (
+        "quests by project",
+        select(Quest).where(Quest.project_id == 1),
+        "quests",
+    ),
+    (
+        "farcaster quests by project",
+        select(FarcasterQuest).where(FarcasterQuest.project_id == 1),
+        "farcaster_quests",
+    ),
+    (
+        "project leaderboard",
+        select(UserProjectXP.user_id, UserProjectXP.xp)
+        .where(UserProjectXP.project_id == 1)
+        .order_by(UserProjectXP.xp.desc())
+        .limit(100),
+        "user_project_xp",
+    ),
+    (
+        "user by twitter username",
+        select(User.id).where(User.twitter_username == "glaria"),
+        "users",
+    ),
+]
+
+
+def _scans(plan, table):
+    """Yield the node types of every plan node that reads `table`."""
+    if plan.get("Relation Name") == table:
+        yield plan["Node Type"]
+    for child in plan.get("Plans", []):
+        yield from _scans(child, table)
+
+
+def main():
+    engine = create_engine(DATABASE_URL)
+    failures = 0
+
+    with engine.begin() as conn:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, stmt, table in HOT_QUERIES:
+            sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+            plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()[0]["Plan"]
+            nodes = list(_scans(plan, table))
+            ok = bool(nodes) and all(node != "Seq Scan" for node in nodes)
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name:<34} {table}: {', '.join(nodes) or 'not read'}")
+
+    engine.dispose()
+    if failures:
+        print(f"{failures} hot quer{'y' if failures == 1 else 'ies'} without an index")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
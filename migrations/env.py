@@ -0,0 +1,49 @@
+# migrations/env.py
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.database import DATABASE_URL, Base
+from app.models import (  # noqa: F401  (register every table on its metadata)
+    entity_version, farcaster, glaria_quest, nonce, project, quests,
+    twitter_token, user, user_completed_quest, user_project_xp,
+)
+
+config = context.config
+
+# Skip logging setup when invoked from the app (app.core.migrations) so
+# fileConfig does not disable the server's loggers
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+# Farcaster and wallet-nonce models live on their own declarative bases
+target_metadata = [Base.metadata, farcaster.Base.metadata, nonce.Base.metadata]
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = create_engine(DATABASE_URL, poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
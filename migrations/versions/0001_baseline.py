@@ -0,0 +1,188 @@
+"""baseline schema
+
+Creates every table as it existed before migrations were introduced.
+Tables that already exist (created by ``Base.metadata.create_all`` or by
+hand) are left untouched, so existing databases can simply be upgraded.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_table(name, *columns, **kw):
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns, **kw)  # also creates the index=True column indexes
+
+
+def upgrade() -> None:
+    _create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("username", sa.String(), nullable=False, index=True, unique=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("twitter_id", sa.String(), nullable=True),
+        sa.Column("twitter_username", sa.String(), nullable=True),
+        sa.Column("wallet_address", sa.String(), nullable=True),
+        sa.Column("xp", sa.Integer(), nullable=True),
+        sa.Column("nft_image_url", sa.String(), nullable=True),
+        sa.UniqueConstraint("twitter_id"),
+        sa.UniqueConstraint("wallet_address"),
+    )
+    _create_table(
+        "projects",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("twitter_username", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("project_type", sa.Enum("NFT", "GameFi", "DeFi", name="projecttypeenum"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("image_url", sa.String(), nullable=True),
+        sa.Column("discord_url", sa.String(), nullable=True),
+        sa.Column("telegram_url", sa.String(), nullable=True),
+        sa.Column("twitter_url", sa.String(), nullable=True),
+        sa.UniqueConstraint("twitter_username"),
+    )
+    _create_table(
+        "quests",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("points", sa.Integer(), nullable=True),
+        sa.Column("project_points", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    _create_table(
+        "quest_actions",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("quest_id", sa.Integer(), sa.ForeignKey("quests.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("button_type", sa.String(), nullable=False),
+        sa.Column("target_url", sa.String(), nullable=True),
+    )
+    _create_table(
+        "user_completed_quests",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("quest_id", sa.Integer(), nullable=False),
+        sa.Column("quest_type", sa.Enum("glaria", "project", name="questtypeenum"), nullable=False),
+        sa.Column("collected_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.UniqueConstraint("user_id", "quest_id", "quest_type", name="_user_quest_uc"),
+    )
+    _create_table(
+        "user_project_xp",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("xp", sa.Integer(), nullable=True),
+        sa.UniqueConstraint("user_id", "project_id", name="user_project_unique"),
+    )
+    _create_table(
+        "glaria_quests",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("button_type", sa.String(), nullable=False),
+        sa.Column("target_url", sa.String(), nullable=True),
+        sa.Column("points", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    _create_table(
+        "twitter_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("twitter_id", sa.String(), nullable=False, index=True, unique=True),
+        sa.Column("access_token", sa.Text(), nullable=False),
+        sa.Column("refresh_token", sa.Text(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    _create_table(
+        "wallet_nonces",
+        sa.Column("address", sa.String(), primary_key=True),
+        sa.Column("nonce", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    _create_table(
+        "entity_versions",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+    )
+
+    # Farcaster
+    _create_table(
+        "farcaster_nonces",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("nonce", sa.String(255), nullable=False, index=True, unique=True),
+        sa.Column("fid", sa.Integer(), nullable=True),
+        sa.Column("used", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    _create_table(
+        "farcaster_users",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("fid", sa.Integer(), nullable=False, index=True, unique=True),
+        sa.Column("custody_address", sa.String(255), nullable=False),
+        sa.Column("username", sa.String(255), nullable=True),
+        sa.Column("display_name", sa.String(255), nullable=True),
+        sa.Column("pfp_url", sa.String(512), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    _create_table(
+        "farcaster_projects",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("fid", sa.Integer(), nullable=True),
+        sa.Column("farcaster_username", sa.String(255), nullable=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("image_url", sa.String(512), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    _create_table(
+        "farcaster_quests",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("type", sa.String(100), nullable=False),
+        sa.Column("button_type", sa.String(100), nullable=False),
+        sa.Column("target_url", sa.String(512), nullable=True),
+        sa.Column("points", sa.Integer(), nullable=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("farcaster_projects.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    _create_table(
+        "farcaster_quest_actions",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("quest_id", sa.Integer(), sa.ForeignKey("farcaster_quests.id"), nullable=False),
+        sa.Column("type", sa.String(100), nullable=False),
+        sa.Column("target_url", sa.String(512), nullable=True),
+    )
+    _create_table(
+        "farcaster_user_completed_quests",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("farcaster_user_id", sa.Integer(), sa.ForeignKey("farcaster_users.id"), nullable=False),
+        sa.Column("quest_id", sa.Integer(), sa.ForeignKey("farcaster_quests.id"), nullable=False),
+        sa.Column("quest_type", sa.String(50), nullable=False),
+        sa.Column("completed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    # The baseline adopts pre-existing tables; never drop them from here.
+    pass
@@ -0,0 +1,92 @@
+"""on delete cascade foreign keys
+
+Deleting a project or user is a single statement: the database removes
+dependent quests, actions, completions and XP rows itself, so the ORM no
+longer has to load and delete them one by one.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referred table)
+CASCADE_FKS = [
+    ("quests", "project_id", "projects"),
+    ("quest_actions", "quest_id", "quests"),
+    ("user_completed_quests", "user_id", "users"),
+    ("user_project_xp", "user_id", "users"),
+    ("user_project_xp", "project_id", "projects"),
+    ("farcaster_quests", "project_id", "farcaster_projects"),
+    ("farcaster_quest_actions", "quest_id", "farcaster_quests"),
+    ("farcaster_user_completed_quests", "farcaster_user_id", "farcaster_users"),
+    ("farcaster_user_completed_quests", "quest_id", "farcaster_quests"),
+]
+
+# Foreign keys that had no ON DELETE action before this revision
+PREVIOUSLY_NO_ACTION = {t for t in CASCADE_FKS if t[0].startswith("farcaster_")}
+
+
+def _replace_fk(table: str, column: str, referred: str, on_delete: str) -> str:
+    """Swap the FK for one with ``on_delete``, added NOT VALID; returns its name for ``_validate``."""
+    insp = sa.inspect(op.get_bind())
+    for fk in insp.get_foreign_keys(table):
+        if fk["constrained_columns"] == [column] and fk["name"]:
+            op.drop_constraint(fk["name"], table, type_="foreignkey")
+
+    name = f"{table}_{column}_fkey"
+    op.execute(
+        f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+        f"REFERENCES {referred} (id) ON DELETE {on_delete} NOT VALID"
+    )
+    return name
+
+
+def _validate(constraints: list[tuple[str, str]]) -> None:
+    # The DROP/ADD above hold ACCESS EXCLUSIVE locks until their transaction
+    # commits; autocommit_block commits it first, so the validation scans run
+    # under SHARE UPDATE EXCLUSIVE and reads and writes carry on meanwhile.
+    with op.get_context().autocommit_block():
+        for table, name in constraints:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def upgrade() -> None:
+    added = [(table, _replace_fk(table, column, referred, "CASCADE")) for table, column, referred in CASCADE_FKS]
+    _validate(added)
+
+    # user_completed_quests.quest_id has no FK (it points at either quests or
+    # glaria_quests); orphans are purged in batches by quest id after deletes.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_user_completed_quests_quest",
+            "user_completed_quests",
+            ["quest_id", "quest_type"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_user_completed_quests_quest",
+            table_name="user_completed_quests",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+    added = [(table, _replace_fk(table, column, referred, "NO ACTION"))
+             for table, column, referred in PREVIOUSLY_NO_ACTION]
+    _validate(added)
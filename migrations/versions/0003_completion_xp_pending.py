@@ -0,0 +1,50 @@
+"""user_completed_quests.xp_pending
+
+Marks completions whose XP has not been applied yet (write-behind mode).
+The partial index keeps the recovery scan cheap: it only covers the few
+rows that are pending at any moment.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Constant default: no table rewrite on Postgres 11+
+    op.add_column(
+        "user_completed_quests",
+        sa.Column("xp_pending", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_user_completed_quests_xp_pending",
+            "user_completed_quests",
+            ["id"],
+            postgresql_where=sa.text("xp_pending"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_user_completed_quests_xp_pending",
+            table_name="user_completed_quests",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("user_completed_quests", "xp_pending")
@@ -0,0 +1,96 @@
+"""indexes and constraints for hot query patterns
+
+- farcaster_user_completed_quests: unique (farcaster_user_id, quest_id),
+  duplicates from earlier double claims are removed first (oldest kept)
+- quests.project_id, farcaster_quests.project_id
+- user_project_xp (project_id, xp) for the per-project leaderboard
+- users.twitter_username
+
+user_completed_quests lookups by user_id are already served by the
+_user_quest_uc unique index (user_id is its leading column), so no
+separate index is added for them.
+
+Indexes are built CONCURRENTLY so writes keep flowing during the upgrade.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_quests_project_id", "quests", ["project_id"]),
+    ("ix_farcaster_quests_project_id", "farcaster_quests", ["project_id"]),
+    ("ix_user_project_xp_project_xp", "user_project_xp", ["project_id", "xp"]),
+    ("ix_users_twitter_username", "users", ["twitter_username"]),
+]
+
+UNIQUE_BUILD_ATTEMPTS = 3
+
+DEDUPE_CLAIMS = """
+    DELETE FROM farcaster_user_completed_quests a
+    USING farcaster_user_completed_quests b
+    WHERE a.farcaster_user_id = b.farcaster_user_id
+      AND a.quest_id = b.quest_id
+      AND a.id > b.id
+"""
+
+INVALID_UNIQUE_INDEX = sa.text("""
+    SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = 'uq_farcaster_user_quest' AND NOT i.indisvalid
+""")
+
+
+def _build_unique_claims_index() -> None:
+    # Runs in autocommit: the old release keeps serving during the deploy and can
+    # insert a duplicate claim after the dedupe. A failed concurrent build leaves an
+    # INVALID index that if_not_exists would then skip, so drop it, dedupe again and retry.
+    bind = op.get_bind()
+    for attempt in range(1, UNIQUE_BUILD_ATTEMPTS + 1):
+        if bind.execute(INVALID_UNIQUE_INDEX).first():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_farcaster_user_quest")
+        op.execute(DEDUPE_CLAIMS)
+        try:
+            op.create_index(
+                "uq_farcaster_user_quest",
+                "farcaster_user_completed_quests",
+                ["farcaster_user_id", "quest_id"],
+                unique=True,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            return
+        except sa.exc.IntegrityError:
+            if attempt == UNIQUE_BUILD_ATTEMPTS:
+                raise
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        _build_unique_claims_index()
+
+    # Promote the unique index to a constraint (instant, reuses the index)
+    op.execute(
+        "ALTER TABLE farcaster_user_completed_quests "
+        "ADD CONSTRAINT uq_farcaster_user_quest UNIQUE USING INDEX uq_farcaster_user_quest"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_farcaster_user_quest", "farcaster_user_completed_quests", type_="unique")
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,40 @@
+"""image_variants columns
+
+Resized WebP copies of project logos and NFT avatars, written by the image
+worker as {"thumb": url, "card": url}. NULL until processed (or for images
+we do not host), in which case clients fall back to the original URL.
+
+Nullable columns without a default: no table rewrite.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 10:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    ("projects", "image_variants"),
+    ("farcaster_projects", "image_variants"),
+    ("users", "nft_image_variants"),
+]
+
+
+def upgrade() -> None:
+    for table, column in COLUMNS:
+        op.add_column(table, sa.Column(column, sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    for table, column in reversed(COLUMNS):
+        op.drop_column(table, column)